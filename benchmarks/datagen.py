@@ -0,0 +1,167 @@
+"""
+基准测试数据生成器：同样的参数总是生成逐字节相同的数据。
+
+数据集：
+  narrow       窄表（6 列），含 18 位长数字 ID、低基数地区列
+  wide         宽表（60 列）
+  blank        大量全空 / 纯空白行（另有 gzip 压缩版本）
+  gbk          GBK 编码的窄表
+  merge_dup    4 个窄表分片，相邻分片的 ID 重叠一半（按关键列去重）
+  late_blank   整数列 qty 只在最后 5% 的行为空（分块推断类型时前后块不一致）；
+               merge_late_blank 为两个分片，第二个分片末尾为空
+  ref_*        查重用的对比集（与主表 ID 部分重叠）
+
+用法：
+  python benchmarks/datagen.py --size small --out benchmarks/data
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SIZES = {
+    'small': 10_000,
+    'medium': 1_000_000,
+    'large': 10_000_000,
+}
+
+# Excel 单表上限 1,048,576 行，超过后不再生成 xlsx 数据集
+XLSX_MAX_ROWS = 1_000_000
+
+CHUNK_ROWS = 500_000
+SEED = 20240101
+ID_BASE = 10 ** 17
+
+REGIONS = ['华东', '华南', '华北', '西南', '西北', '东北', '华中']
+NAMES = ['张三', '李四', '王五', '赵六', '孙七', '周八', '吴九', '郑十']
+
+
+def _narrow_chunk(rng, start, rows):
+    ids = np.arange(start, start + rows, dtype=np.int64) + ID_BASE
+    return pd.DataFrame({
+        'id': ids.astype(str),
+        'name': rng.choice(NAMES, rows),
+        'region': rng.choice(REGIONS, rows),
+        'amount': np.round(rng.uniform(0, 10_000, rows), 2),
+        'qty': rng.integers(0, 1_000, rows),
+        'note': rng.choice(['', ' ', 'VIP', '退货', 'normal'], rows),
+    })
+
+
+def _wide_chunk(rng, start, rows, n_cols=60):
+    df = _narrow_chunk(rng, start, rows)
+    for i in range(n_cols - len(df.columns)):
+        if i % 3 == 0:
+            df[f'c{i}'] = rng.integers(0, 100_000, rows)
+        elif i % 3 == 1:
+            df[f'c{i}'] = np.round(rng.normal(0, 1, rows), 4)
+        else:
+            df[f'c{i}'] = rng.choice(REGIONS, rows)
+    return df
+
+
+def _blank_chunk(rng, start, rows):
+    df = _narrow_chunk(rng, start, rows).astype(object)
+    blank_rows = rng.random(rows) < 0.3
+    df.loc[blank_rows, :] = rng.choice(['', ' ', '\t'], (int(blank_rows.sum()), len(df.columns)))
+    partial = rng.random(rows) < 0.2
+    df.loc[partial, 'name'] = ''
+    return df
+
+
+def _late_blank_chunk(rng, start, rows, total):
+    df = _narrow_chunk(rng, start, rows)
+    qty = pd.array(df['qty'], dtype='Int64')
+    qty[np.arange(start, start + rows) >= total * 0.95] = pd.NA
+    df['qty'] = qty
+    return df
+
+
+def _write_csv(path, make_chunk, rows, encoding='utf-8', seed=SEED):
+    rng = np.random.default_rng(seed)
+    first = True
+    for start in range(0, rows, CHUNK_ROWS):
+        chunk = make_chunk(rng, start, min(CHUNK_ROWS, rows - start))
+        chunk.to_csv(path, index=False, encoding=encoding,
+                      mode='w' if first else 'a', header=first, lineterminator='\n')
+        first = False
+
+
+def _write_xlsx(path, make_chunk, rows, seed=SEED):
+    rng = np.random.default_rng(seed)
+    make_chunk(rng, 0, rows).to_excel(path, index=False)
+
+
+def generate(size, out_dir, force=False):
+    """生成指定规模的全部数据集，返回 {数据集名: 路径}"""
+    rows = SIZES[size]
+    base = os.path.join(out_dir, size)
+    os.makedirs(os.path.join(base, 'merge_narrow'), exist_ok=True)
+    os.makedirs(os.path.join(base, 'merge_wide'), exist_ok=True)
+    os.makedirs(os.path.join(base, 'merge_dup'), exist_ok=True)
+    os.makedirs(os.path.join(base, 'merge_late_blank'), exist_ok=True)
+
+    part_rows = max(rows // 4, 1)
+    plan = {}
+
+    # 合并用：4 个分片，其中一个为 GBK 编码，小规模时额外加一个 xlsx
+    for i in range(4):
+        encoding = 'gbk' if i == 1 else 'utf-8'
+        plan[f'merge_narrow/part_{i}.csv'] = (
+            'csv', lambda rng, s, n, i=i: _narrow_chunk(rng, s + i * part_rows, n), part_rows, encoding, SEED + i)
+        plan[f'merge_wide/part_{i}.csv'] = (
+            'csv', lambda rng, s, n, i=i: _wide_chunk(rng, s + i * part_rows, n), part_rows, 'utf-8', SEED + 10 + i)
+        # 每个分片从上一分片的中间开始编号，跨文件重复的 ID 约占 3/8
+        plan[f'merge_dup/part_{i}.csv'] = (
+            'csv', lambda rng, s, n, i=i: _narrow_chunk(rng, s + i * part_rows // 2, n),
+            part_rows, 'utf-8', SEED + 20 + i)
+    plan['merge_late_blank/part_0.csv'] = ('csv', _narrow_chunk, part_rows, 'utf-8', SEED + 30)
+    plan['merge_late_blank/part_1.csv'] = (
+        'csv', lambda rng, s, n: _late_blank_chunk(rng, s, n, part_rows), part_rows, 'utf-8', SEED + 31)
+    if part_rows <= XLSX_MAX_ROWS:
+        plan['merge_narrow/part_4.xlsx'] = (
+            'xlsx', lambda rng, s, n: _narrow_chunk(rng, s + 4 * part_rows, n), min(part_rows, 100_000), None, SEED + 4)
+
+    plan['narrow.csv'] = ('csv', _narrow_chunk, rows, 'utf-8', SEED)
+    plan['narrow_gbk.csv'] = ('csv', _narrow_chunk, rows, 'gbk', SEED)
+    plan['wide.csv'] = ('csv', _wide_chunk, rows, 'utf-8', SEED + 1)
+    plan['blank.csv'] = ('csv', _blank_chunk, rows, 'utf-8', SEED + 2)
+    plan['blank.csv.gz'] = ('csv', _blank_chunk, rows, 'utf-8', SEED + 2)
+    plan['late_blank.csv'] = ('csv', lambda rng, s, n: _late_blank_chunk(rng, s, n, rows), rows, 'utf-8', SEED + 5)
+    if rows <= XLSX_MAX_ROWS:
+        plan['narrow.xlsx'] = ('xlsx', _narrow_chunk, rows, None, SEED)
+
+    # 对比集：一半与主表 ID 重叠，一半在主表范围之外
+    for name, ref_rows in [('ref_1k', 1_000), ('ref_10pct', rows // 10), ('ref_full', rows)]:
+        offset = rows - ref_rows // 2
+        plan[f'{name}.csv'] = (
+            'csv', lambda rng, s, n, offset=offset: _narrow_chunk(rng, s + offset, n)[['id']],
+            max(ref_rows, 1), 'utf-8', SEED + 3)
+
+    paths = {}
+    for rel, (kind, make_chunk, n, encoding, seed) in plan.items():
+        path = os.path.join(base, rel)
+        paths[rel] = path
+        if os.path.exists(path) and not force:
+            continue
+        print(f"生成 {path} ({n} 行)")
+        if kind == 'csv':
+            _write_csv(path, make_chunk, n, encoding=encoding, seed=seed)
+        else:
+            _write_xlsx(path, make_chunk, n, seed=seed)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成 xlsxSelector 基准测试数据")
+    parser.add_argument('--size', choices=list(SIZES), default='small')
+    parser.add_argument('--out', default=os.path.join(os.path.dirname(__file__), 'data'))
+    parser.add_argument('--force', action='store_true', help="已存在的文件也重新生成")
+    args = parser.parse_args()
+    generate(args.size, args.out, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
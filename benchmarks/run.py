@@ -0,0 +1,379 @@
+"""
+xlsxSelector 基准测试。
+
+每个用例在独立子进程中运行（保证峰值内存互不干扰），通过脚本化的 input()
+非交互地驱动合并、分割、查重、清理四个工具，记录耗时、峰值内存和输出校验和，
+并与保存的基线比较；耗时/内存超出容差或输出校验和变化时以非零状态退出。
+
+用法：
+  python benchmarks/run.py --size small --save-baseline    # 记录基线
+  python benchmarks/run.py --size small                    # 与基线比较
+  python benchmarks/run.py --size small --case merge_narrow
+"""
+
+import argparse
+import builtins
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import datagen  # noqa: E402
+
+DEFAULT_DATA_DIR = os.path.join(HERE, 'data')
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+
+
+# ========================
+# 脚本化输入
+# ========================
+
+class ScriptedInput:
+    """
+    按顺序回答工具的 input() 提问。
+    只有当提示语包含队首规则的关键字时才消费该规则，其余提问一律回答空串（即使用默认值），
+    因此工具新增带默认值的提问时，基准脚本无需改动。
+    关键字为空串的规则只匹配无提示语的 input()。
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.unmatched = 0
+
+    def __call__(self, prompt=''):
+        if self.rules:
+            key, answer = self.rules[0]
+            if (key == '' and prompt == '') or (key and key in prompt):
+                self.rules.pop(0)
+                self.unmatched = 0
+                return answer
+        self.unmatched += 1
+        if self.unmatched > 50:
+            raise RuntimeError(f"脚本化输入卡在提问: {prompt!r}，期望: {self.rules[:1]}")
+        return ''
+
+
+# ========================
+# 用例
+# ========================
+
+def case_merge(data, out_dir, dataset, keys=None, keep='1', output_name='merged.csv'):
+    import xlsxSelector
+    output = os.path.join(out_dir, output_name)
+    rules = [("请输入文件夹路径", os.path.join(data, dataset))]
+    if keys:
+        rules += [("是否去重", 'y'), ("请输入关键列", keys), ("重复时保留", keep)]
+    if output_name.endswith('.xlsx'):
+        rules.append(("请选择输出格式", '2'))
+    rules.append(("请输入输出文件路径", output))
+    return xlsxSelector.merge_files, rules, [output]
+
+
+def case_split(data, out_dir, dataset):
+    import xlsxSelector
+    rows = datagen.SIZES[os.path.basename(data)]
+    rules = [
+        ("请输入您要截取的", os.path.join(data, dataset)),
+        ("请选择 (1/2", '1'),
+        ("请输入开始截取的行数", '1'),
+        ("请输入每次截取的行数", str(max(rows // 4, 1))),
+        ("请输入需要这样截取几次", '4'),
+        ("请输入保存截取文件的目录地址", out_dir),
+        ("请输入输出文件的名称前缀", 'part'),
+        ("请选择输出文件格式", 'csv'),
+    ]
+    return xlsxSelector.split_excel_or_csv, rules, os.path.join(out_dir, 'part_part_*.csv')
+
+
+def case_partition(data, out_dir, dataset, column):
+    import xlsxSelector
+    rules = [
+        ("请输入您要截取的", os.path.join(data, dataset)),
+        ("请选择 (1/2", '3'),
+        ("请输入按哪一列拆分", column),
+        ("请输入保存截取文件的目录地址", out_dir),
+        ("请输入输出文件的名称前缀", 'part'),
+        ("请选择输出文件格式", 'csv'),
+    ]
+    return xlsxSelector.split_excel_or_csv, rules, os.path.join(out_dir, 'part_*.csv')
+
+
+def case_dedup(data, out_dir, main, ref):
+    import xlsxSelector
+    output = os.path.join(out_dir, 'dedup.csv')
+    rules = [
+        ("请输入主文件路径", os.path.join(data, main)),
+        ("请选择 Sheet", ''),
+        ("请输入主文件用于比较的列名", 'id'),
+        ('', os.path.join(data, ref) + ';'),
+        ("请选择 Sheet", ''),
+        ("比较列名", 'id'),
+        ("请输入保存路径", output),
+    ]
+    return xlsxSelector.deduplicate_files, rules, [output]
+
+
+def case_dedup_batch(data, out_dir, mains, ref):
+    import xlsxSelector
+    rules = [
+        ("请选择查重方式", '2'),
+        ("请输入主文件路径或文件夹", ';'.join(os.path.join(data, m) for m in mains)),
+        ("请输入主文件用于比较的列名", 'id'),
+        ('', os.path.join(data, ref) + ';'),
+        ("请选择 Sheet", ''),
+        ("比较列名", 'id'),
+        ("请输入保存结果的目录", out_dir),
+    ]
+    return xlsxSelector.deduplicate_files, rules, os.path.join(out_dir, '*_dedup.csv')
+
+
+def case_clean(data, out_dir, dataset, output_name='cleaned.csv'):
+    import xlsxSelector
+    output = os.path.join(out_dir, output_name)
+
+    def run():
+        xlsxSelector.clean_spreadsheet(os.path.join(data, dataset), output, ['id', 'name'])
+
+    return run, [], [output]
+
+
+def case_planned(data, out_dir, strategy, factory, **kwargs):
+    """强制指定执行策略（分块行数取数据规模的 1/8，保证会分成多块），输出应与自动策略一致"""
+    import xlsxSelector
+    xlsxSelector.planner.strategy = strategy
+    xlsxSelector.planner.chunk_rows = max(datagen.SIZES[os.path.basename(data)] // 8, 1_000)
+    return factory(data, out_dir, **kwargs)
+
+
+CASES = {
+    'merge_narrow': (case_merge, {'dataset': 'merge_narrow'}),
+    'merge_wide': (case_merge, {'dataset': 'merge_wide'}),
+    'merge_dup_keys': (case_merge, {'dataset': 'merge_dup', 'keys': 'id'}),
+    'merge_dup_keys_last': (case_merge, {'dataset': 'merge_dup', 'keys': 'id', 'keep': '2'}),
+    'merge_dup_keys_stream': (case_planned, {'strategy': 'streaming', 'factory': case_merge,
+                                             'dataset': 'merge_dup', 'keys': 'id'}),
+    'merge_narrow_stream': (case_planned, {'strategy': 'streaming', 'factory': case_merge, 'dataset': 'merge_narrow'}),
+    'split_narrow_csv': (case_split, {'dataset': 'narrow.csv'}),
+    'split_wide_csv': (case_split, {'dataset': 'wide.csv'}),
+    'split_narrow_xlsx': (case_split, {'dataset': 'narrow.xlsx'}),
+    'split_narrow_stream': (case_planned, {'strategy': 'streaming', 'factory': case_split, 'dataset': 'narrow.csv'}),
+    'partition_region': (case_partition, {'dataset': 'narrow.csv', 'column': 'region'}),
+    'partition_id': (case_partition, {'dataset': 'narrow.csv', 'column': 'id'}),
+    'dedup_ref_1k': (case_dedup, {'main': 'narrow.csv', 'ref': 'ref_1k.csv'}),
+    'dedup_ref_10pct': (case_dedup, {'main': 'narrow.csv', 'ref': 'ref_10pct.csv'}),
+    'dedup_ref_full': (case_dedup, {'main': 'narrow.csv', 'ref': 'ref_full.csv'}),
+    'dedup_ref_10pct_stream': (case_planned, {'strategy': 'streaming', 'factory': case_dedup,
+                                              'main': 'narrow.csv', 'ref': 'ref_10pct.csv'}),
+    'dedup_batch': (case_dedup_batch, {'mains': ['narrow.csv', 'wide.csv', 'blank.csv'], 'ref': 'ref_10pct.csv'}),
+    'clean_blank': (case_clean, {'dataset': 'blank.csv'}),
+    # 整数列末尾才出现空值：分块处理的输出应与整表读入逐字节一致
+    'merge_late_blank': (case_merge, {'dataset': 'merge_late_blank'}),
+    'merge_late_blank_stream': (case_planned, {'strategy': 'streaming', 'factory': case_merge,
+                                               'dataset': 'merge_late_blank'}),
+    'merge_late_blank_xlsx': (case_merge, {'dataset': 'merge_late_blank', 'output_name': 'merged.xlsx'}),
+    'merge_late_blank_xlsx_spill': (case_planned, {'strategy': 'streaming', 'factory': case_merge,
+                                                   'dataset': 'merge_late_blank', 'output_name': 'merged.xlsx'}),
+    'split_late_blank': (case_split, {'dataset': 'late_blank.csv'}),
+    'split_late_blank_stream': (case_planned, {'strategy': 'streaming', 'factory': case_split,
+                                               'dataset': 'late_blank.csv'}),
+    'dedup_late_blank': (case_dedup, {'main': 'late_blank.csv', 'ref': 'ref_10pct.csv'}),
+    'dedup_late_blank_stream': (case_planned, {'strategy': 'streaming', 'factory': case_dedup,
+                                               'main': 'late_blank.csv', 'ref': 'ref_10pct.csv'}),
+    'clean_late_blank_xlsx': (case_clean, {'dataset': 'late_blank.csv', 'output_name': 'cleaned.xlsx'}),
+    'clean_late_blank_xlsx_spill': (case_planned, {'strategy': 'spill', 'factory': case_clean,
+                                                   'dataset': 'late_blank.csv', 'output_name': 'cleaned.xlsx'}),
+    'clean_blank_gz': (case_clean, {'dataset': 'blank.csv.gz', 'output_name': 'cleaned.csv.gz'}),
+}
+
+
+def case_available(name, data):
+    _, kwargs = CASES[name]
+    first = kwargs.get('dataset') or kwargs.get('main') or kwargs['mains'][0]
+    return os.path.exists(os.path.join(data, first))
+
+
+# ========================
+# 子进程：执行单个用例
+# ========================
+
+def checksum(paths):
+    """输出文件校验和；xlsx 与压缩文件含时间戳，按解压/转换后的内容计算"""
+    import pandas as pd
+    import xlsxSelector
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        if path.endswith('.xlsx'):
+            digest.update(pd.read_excel(path, dtype=str).to_csv(index=False).encode())
+        else:
+            with xlsxSelector.open_binary_source(path) as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def run_case(name, data, out_dir):
+    import xlsxSelector
+    factory, kwargs = CASES[name]
+    func, rules, outputs = factory(data, out_dir, **kwargs)
+
+    # 解析缓存会让重复运行直接命中磁盘缓存，基准测试中关闭
+    xlsxSelector.table_cache.enabled = False
+    builtins.input = ScriptedInput(rules)
+    start = time.perf_counter()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        func()
+    elapsed = time.perf_counter() - start
+
+    if isinstance(outputs, str):
+        outputs = sorted(glob.glob(outputs))
+    missing = [p for p in outputs if not os.path.exists(p)]
+    if not outputs or missing:
+        raise RuntimeError(f"用例 {name} 未生成输出: {missing or outputs}")
+
+    return {
+        'seconds': elapsed,
+        'peak_rss': xlsxSelector.get_peak_rss(),
+        'outputs': len(outputs),
+        'checksum': checksum(outputs),
+    }
+
+
+# ========================
+# 主进程：调度、对比基线
+# ========================
+
+def spawn_case(name, size, data_root, work_dir):
+    out_dir = os.path.join(work_dir, name)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.makedirs(out_dir)
+    cmd = [sys.executable, os.path.abspath(__file__), '--child', name,
+           '--size', size, '--data', data_root, '--work', work_dir]
+    proc = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+    if proc.returncode != 0:
+        raise RuntimeError(f"用例 {name} 失败:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    """
+    多次运行取耗时中位数和最小的峰值内存；
+    spread 记录最慢一次/中位数之比，反映该用例在本机上的耗时抖动幅度（保存基线时记录）。
+    """
+    times = [r['seconds'] for r in runs]
+    median = statistics.median(times)
+    result = dict(runs[0], seconds=median)
+    result['spread'] = max(times) / median if median > 0 else 1.0
+    rss = [r['peak_rss'] for r in runs if r['peak_rss']]
+    result['peak_rss'] = min(rss) if rss else None
+    return result
+
+
+def is_slower(result, base, time_tol, min_delta):
+    """
+    容差为 time_tol 加上基线记录的抖动幅度：写上万个小文件的分区等用例受文件系统影响，
+    同一代码的耗时可相差数倍，固定 20% 会误报。
+    只使用基线的抖动幅度，本次运行变慢的同时变得更不稳定也不会放宽自己的阈值。
+    """
+    tol = time_tol + max(base.get('spread', 1.0) - 1, 0)
+    return (result['seconds'] > base['seconds'] * (1 + tol)
+            and result['seconds'] - base['seconds'] > min_delta)
+
+
+def compare(results, baseline, time_tol, mem_tol, min_delta):
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['checksum'] != base['checksum']:
+            failures.append(f"{name}: 输出校验和变化 {base['checksum'][:12]} -> {result['checksum'][:12]}")
+        if is_slower(result, base, time_tol, min_delta):
+            failures.append(f"{name}: 耗时 {base['seconds']:.3f}s -> {result['seconds']:.3f}s "
+                            f"(+{result['seconds'] / base['seconds'] - 1:.0%})")
+        if result['peak_rss'] and base.get('peak_rss') and result['peak_rss'] > base['peak_rss'] * (1 + mem_tol):
+            failures.append(f"{name}: 峰值内存 {base['peak_rss'] / 2**20:.1f}MB -> {result['peak_rss'] / 2**20:.1f}MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="xlsxSelector 基准测试")
+    parser.add_argument('--size', choices=list(datagen.SIZES), default='small')
+    parser.add_argument('--case', action='append', choices=list(CASES), help="只运行指定用例，可重复")
+    parser.add_argument('--data', default=DEFAULT_DATA_DIR, help="数据目录（不存在时自动生成）")
+    parser.add_argument('--work', default=os.path.join(HERE, 'work'), help="输出文件临时目录")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="将本次结果保存为基线")
+    parser.add_argument('--time-tolerance', type=float, default=0.2, help="允许的耗时增幅（默认 0.2 = 20%%）")
+    parser.add_argument('--mem-tolerance', type=float, default=0.2, help="允许的峰值内存增幅（默认 0.2）")
+    parser.add_argument('--min-delta', type=float, default=0.25,
+                        help="耗时增加少于该秒数时不视为回归，避免小数据量的抖动（默认 0.25）")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="每个用例运行次数，取中位数（默认 5）；疑似变慢的用例会再补跑同样次数确认")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    data = os.path.join(args.data, args.size)
+
+    if args.child:
+        out_dir = os.path.join(args.work, args.child)
+        print(json.dumps(run_case(args.child, data, out_dir)))
+        return
+
+    datagen.generate(args.size, args.data)
+
+    names = args.case or [n for n in CASES if case_available(n, data)]
+    repeat = max(args.repeat, 1)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baselines = json.load(f)
+    baseline = {} if args.save_baseline else baselines.get(args.size, {})
+
+    results = {}
+    print(f"{'用例':<28}{'耗时(s)':>10}{'抖动':>8}{'峰值内存(MB)':>14}  校验和")
+    for name in names:
+        runs = [spawn_case(name, args.size, args.data, args.work) for _ in range(repeat)]
+        result = summarize(runs)
+        # 疑似变慢时补跑一轮再判断，避免成段的调度/IO 抖动被当作回归
+        base = baseline.get(name)
+        if base and is_slower(result, base, args.time_tolerance, args.min_delta):
+            runs += [spawn_case(name, args.size, args.data, args.work) for _ in range(repeat)]
+            result = summarize(runs)
+        results[name] = result
+        rss = f"{result['peak_rss'] / 2**20:.1f}" if result['peak_rss'] else "-"
+        print(f"{name:<28}{result['seconds']:>10.3f}{result['spread']:>7.2f}x{rss:>14}  {result['checksum'][:12]}")
+
+    if args.save_baseline:
+        baselines.setdefault(args.size, {}).update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\n基线已保存: {args.baseline}")
+        return
+
+    if args.size not in baselines:
+        print(f"\n未找到 {args.size} 规模的基线，使用 --save-baseline 记录。")
+        return
+
+    failures = compare(results, baselines[args.size], args.time_tolerance, args.mem_tolerance, args.min_delta)
+    if failures:
+        print("\n❌ 性能回归：")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\n✅ 与基线相比无回归。")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,26 @@
 import pandas as pd
 import numpy as np
 import os
+import io
 import sys
+import bz2
+import gzip
+import lzma
+import json
+import zipfile
+import hashlib
+import time
+import atexit
+import csv
+import shutil
+import tempfile
+import queue
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -34,6 +53,1137 @@ def exit_or_continue():
         sys.exit(0)
 
 
+# ========================
+# 压缩文件与压缩包
+# ========================
+
+# 后缀 -> pandas compression 名称；CSV 可带这些后缀，读取时流式解压、写出时自动压缩
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd', '.xz': 'xz', '.bz2': 'bz2'}
+TABLE_EXTS = ('.csv', '.xlsx', '.xls')
+INPUT_GLOBS = ["*.csv", "*.xlsx", "*.xls", "*.csv.gz", "*.csv.zst", "*.csv.xz", "*.csv.bz2", "*.zip"]
+# zip 包内的文件用 "压缩包路径::包内路径" 表示
+ZIP_MEMBER_SEP = '::'
+
+
+def split_archive_member(path):
+    """拆分 "压缩包::包内文件"，普通路径返回 (路径, None)"""
+    path = str(path)
+    if ZIP_MEMBER_SEP in path:
+        archive, member = path.split(ZIP_MEMBER_SEP, 1)
+        return archive, member
+    return path, None
+
+
+def source_path(path):
+    """磁盘上实际存在的文件（zip 包内文件返回压缩包本身）"""
+    return split_archive_member(path)[0]
+
+
+def source_size(path):
+    return os.path.getsize(source_path(path))
+
+
+def table_ext(path):
+    """表格类型后缀，忽略压缩后缀：data.csv.gz -> .csv，a.zip::b.xlsx -> .xlsx"""
+    archive, member = split_archive_member(path)
+    root, ext = os.path.splitext((member or archive).lower())
+    if ext in COMPRESSION_SUFFIXES:
+        ext = os.path.splitext(root)[1]
+    return ext
+
+
+def compression_of(path):
+    archive, member = split_archive_member(path)
+    if member is not None:
+        return None
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(archive.lower())[1])
+
+
+def is_zip_archive(path):
+    archive, member = split_archive_member(path)
+    return member is None and archive.lower().endswith('.zip')
+
+
+def path_exists(path):
+    archive, member = split_archive_member(path)
+    if not os.path.isfile(archive):
+        return False
+    if member is None:
+        return True
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            return member in zf.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def zip_table_members(archive):
+    """压缩包内的 CSV/Excel 文件，以 "压缩包::包内路径" 形式返回"""
+    with zipfile.ZipFile(archive) as zf:
+        names = [info.filename for info in zf.infolist()
+                 if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+    return [f"{archive}{ZIP_MEMBER_SEP}{name}" for name in names if table_ext(name) in TABLE_EXTS]
+
+
+def expand_archives(paths):
+    """把输入列表中的 zip 包展开为包内的表格文件"""
+    expanded = []
+    for path in paths:
+        if is_zip_archive(path):
+            expanded.extend(zip_table_members(path))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def _require_zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError("读写 .zst 文件需要安装 zstandard（pip install zstandard）")
+
+
+def open_binary_source(path):
+    """以二进制只读方式打开输入，压缩文件与 zip 包内文件均为流式解压"""
+    archive, member = split_archive_member(path)
+    if member is not None:
+        return zipfile.ZipFile(archive).open(member)
+    method = compression_of(archive)
+    if method == 'gzip':
+        return gzip.open(archive, 'rb')
+    if method == 'xz':
+        return lzma.open(archive, 'rb')
+    if method == 'bz2':
+        return bz2.open(archive, 'rb')
+    if method == 'zstd':
+        return _require_zstandard().open(archive, 'rb')
+    return open(archive, 'rb')
+
+
+def open_text_output(path, encoding, append=False):
+    """以文本方式写出 CSV，按后缀自动压缩；zstd 使用多线程压缩"""
+    mode = 'a' if append else 'w'
+    method = compression_of(path)
+    if method == 'gzip':
+        return gzip.open(path, mode + 't', encoding=encoding, newline='')
+    if method == 'xz':
+        return lzma.open(path, mode + 't', encoding=encoding, newline='')
+    if method == 'bz2':
+        return bz2.open(path, mode + 't', encoding=encoding, newline='')
+    if method == 'zstd':
+        zstandard = _require_zstandard()
+        writer = zstandard.ZstdCompressor(threads=-1).stream_writer(open(path, mode + 'b'), closefd=True)
+        return io.TextIOWrapper(writer, encoding=encoding, newline='')
+    return open(path, mode, encoding=encoding, newline='')
+
+
+def write_csv(df, path, append=False, header=True):
+    """写出 CSV（新文件带 BOM，追加时不重复写入），按后缀自动压缩"""
+    with open_text_output(path, 'utf-8' if append else 'utf-8-sig', append=append) as f:
+        df.to_csv(f, index=False, header=header)
+
+
+# 未指定编码时依次尝试
+CSV_ENCODINGS = ['utf-8', 'gbk', 'utf-8-sig', 'cp1252', 'latin1']
+
+
+def read_csv_any(path, **kwargs):
+    """pd.read_csv，额外支持 .gz/.zst/.xz/.bz2 压缩文件和 zip 包内文件"""
+    archive, member = split_archive_member(path)
+    if member is None:
+        # pandas 按后缀自动识别压缩格式并流式解压
+        return pd.read_csv(archive, **kwargs)
+    return pd.read_csv(open_binary_source(path), **kwargs)
+
+
+def read_csv_detected(path, encoding=None, **kwargs):
+    """encoding 为空时按 CSV_ENCODINGS 依次尝试解析，与 count_csv_lines 的检测结果一致"""
+    if encoding is not None:
+        return read_csv_any(path, encoding=encoding, **kwargs)
+    for candidate in CSV_ENCODINGS:
+        try:
+            return read_csv_any(path, encoding=candidate, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError("无法识别文件编码")
+
+
+def _excel_source(path):
+    archive, member = split_archive_member(path)
+    if member is None and compression_of(archive) is None:
+        return archive
+    # Excel 解析需要随机访问，压缩的工作簿先解压到内存
+    with open_binary_source(path) as f:
+        return io.BytesIO(f.read())
+
+
+def read_excel_any(path, **kwargs):
+    return pd.read_excel(_excel_source(path), **kwargs)
+
+
+def excel_sheet_names(path):
+    return pd.ExcelFile(_excel_source(path)).sheet_names
+
+
+# ========================
+# 性能分析
+# ========================
+
+def get_peak_rss():
+    """返回当前进程启动以来的峰值常驻内存（字节），无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (ImportError, OSError):
+        pass
+    # Windows 没有 resource 模块，使用 psutil 提供的 peak_wset
+    try:
+        import psutil
+        return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    except ImportError:
+        return None
+
+
+def get_current_rss():
+    """返回当前进程此刻的常驻内存（字节）：Linux 读 /proc/self/statm，其余平台使用 psutil"""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+def format_bytes(num):
+    """将字节数格式化为易读字符串"""
+    if num is None:
+        return "-"
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num) < 1024:
+            return f"{num:.1f}{unit}"
+        num /= 1024
+    return f"{num:.1f}TB"
+
+
+PROFILE_SAMPLE_INTERVAL = 0.01
+
+
+class Profiler:
+    """
+    可选的性能记录器：按操作/阶段/文件记录耗时、CPU 时间、行数、字节数和内存。
+    内存记录阶段开始时的常驻内存，以及阶段期间由后台线程每 10ms 采样得到的最大值。
+    未启用时 stage() 只返回一个临时字典，几乎没有额外开销。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.json_path = None
+        self.trace = None  # None / 'cprofile' / 'pyinstrument'
+        self.trace_dir = "."
+        self.records = []
+        self._lock = threading.Lock()
+        self._operation = None
+        self._active = {}  # 进行中的阶段 id(record) -> record，由采样线程更新 peak_rss
+        self._sampler = None
+
+    def _sample_memory(self):
+        while True:
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+            rss = get_current_rss()
+            with self._lock:
+                for record in self._active.values():
+                    record['peak_rss'] = max(record['peak_rss'], rss)
+
+    @contextmanager
+    def stage(self, stage, file=None, cpu_clock=time.thread_time):
+        """
+        记录一个阶段。调用方可在 with 块内向返回的字典写入 rows / bytes。
+        CPU 时间默认使用 thread_time，在流水线线程中也只统计本线程。
+        """
+        record = {'rows': None, 'bytes': None}
+        if not self.enabled:
+            yield record
+            return
+
+        rss_start = get_current_rss()
+        if rss_start is not None:
+            record.update(rss_start=rss_start, peak_rss=rss_start)
+            with self._lock:
+                self._active[id(record)] = record
+                if self._sampler is None:
+                    self._sampler = threading.Thread(target=self._sample_memory, daemon=True)
+                    self._sampler.start()
+        wall_start = time.perf_counter()
+        cpu_start = cpu_clock()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            rss_end = get_current_rss()
+            with self._lock:
+                self._active.pop(id(record), None)
+                record.update({
+                    'operation': self._operation,
+                    'stage': stage,
+                    'file': os.path.basename(str(file)) if file is not None else None,
+                    'wall_s': wall,
+                    'cpu_s': cpu_clock() - cpu_start,
+                    'rows_per_s': record['rows'] / wall if record['rows'] and wall > 0 else None,
+                    'rss_start': rss_start,
+                    'peak_rss': max(record.get('peak_rss') or 0, rss_end or 0) or None,
+                })
+                self.records.append(record)
+
+    def run(self, operation, func):
+        """执行一个工具函数，按需套上 cProfile/pyinstrument，并在结束后输出汇总"""
+        if not self.enabled:
+            return func()
+
+        self._operation = operation
+        start = len(self.records)
+        tracer = self._start_trace()
+        try:
+            # 总计包含流水线各线程的 CPU 时间
+            with self.stage('total', cpu_clock=time.process_time):
+                return func()
+        finally:
+            self._stop_trace(tracer, operation)
+            self.print_summary(self.records[start:])
+            if self.json_path:
+                self.write_json()
+            self._operation = None
+
+    def _start_trace(self):
+        if self.trace == 'cprofile':
+            import cProfile
+            tracer = cProfile.Profile()
+            tracer.enable()
+            return tracer
+        if self.trace == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler as InstrumentProfiler
+            except ImportError:
+                print("⚠️  未安装 pyinstrument，跳过调用栈采样。")
+                return None
+            tracer = InstrumentProfiler()
+            tracer.start()
+            return tracer
+        return None
+
+    def _stop_trace(self, tracer, operation):
+        if tracer is None:
+            return
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        if self.trace == 'cprofile':
+            tracer.disable()
+            out = os.path.join(self.trace_dir, f"{operation}_{stamp}.prof")
+            tracer.dump_stats(out)
+        else:
+            tracer.stop()
+            out = os.path.join(self.trace_dir, f"{operation}_{stamp}.html")
+            with open(out, 'w', encoding='utf-8') as f:
+                f.write(tracer.output_html())
+        print(f"🧭 调用栈记录已保存: {out}")
+
+    @staticmethod
+    def aggregate(records):
+        """按 (阶段, 文件) 汇总：分块处理时每块一条记录，合计耗时/行数/字节，起始内存取第一块，峰值取最大"""
+        groups = OrderedDict()
+        for r in records:
+            g = groups.get((r['stage'], r['file']))
+            if g is None:
+                groups[(r['stage'], r['file'])] = dict(r, count=1)
+                continue
+            g['count'] += 1
+            g['wall_s'] += r['wall_s']
+            g['cpu_s'] += r['cpu_s']
+            for field in ('rows', 'bytes'):
+                if r[field] is not None:
+                    g[field] = (g[field] or 0) + r[field]
+            if r['peak_rss'] is not None:
+                g['peak_rss'] = max(g['peak_rss'] or 0, r['peak_rss'])
+        for g in groups.values():
+            g['rows_per_s'] = g['rows'] / g['wall_s'] if g['rows'] and g['wall_s'] > 0 else None
+        return list(groups.values())
+
+    def print_summary(self, records):
+        if not records:
+            return
+        print("\n" + "=" * 50)
+        print("⏱️  性能统计")
+        header = (f"{'阶段':<16}{'文件':<28}{'次数':>6}{'耗时(s)':>9}{'CPU(s)':>9}{'行数':>10}"
+                  f"{'行/秒':>11}{'字节':>10}{'起始内存':>10}{'阶段峰值':>10}")
+        print(header)
+        print("-" * len(header))
+        for r in self.aggregate(records):
+            rows = r['rows'] if r['rows'] is not None else "-"
+            rate = f"{r['rows_per_s']:.0f}" if r['rows_per_s'] else "-"
+            name = (r['file'] or "")[:26]
+            print(f"{r['stage']:<16}{name:<28}{r['count']:>6}{r['wall_s']:>9.3f}{r['cpu_s']:>9.3f}"
+                  f"{rows:>10}{rate:>11}{format_bytes(r['bytes']):>10}"
+                  f"{format_bytes(r['rss_start']):>10}{format_bytes(r['peak_rss']):>10}")
+
+    def write_json(self):
+        try:
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                json.dump({'records': self.records}, f, ensure_ascii=False, indent=2, default=str)
+            print(f"📝 性能数据已写入: {self.json_path}")
+        except Exception as e:
+            print(f"❌ 性能数据写入失败: {e}")
+
+
+profiler = Profiler()
+
+
+# ========================
+# 读取缓存
+# ========================
+
+class TableCache:
+    """
+    会话级解析结果缓存。
+    以 路径 + 大小 + 修改时间 + 读取参数（含 sheet）为键，内存中按 LRU 保留，
+    超出内存预算时溢出到本地缓存目录（优先 Parquet，失败时退回 pickle），
+    程序退出时把内存中的结果写入磁盘，以便下次启动直接复用。
+    返回的 DataFrame 与缓存共享数据，调用方不应原地修改。
+    """
+
+    def __init__(self, memory_budget=512 * 2 ** 20, disk_budget=4 * 2 ** 30, cache_dir=None):
+        self.enabled = True
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".xlsxselector_cache")
+        self._entries = OrderedDict()  # key -> (df, 占用字节, 是否已落盘)
+        self._used = 0
+        self._meta = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, path, options):
+        stat = os.stat(source_path(path))
+        raw = json.dumps([kind, os.path.abspath(str(path)), stat.st_size, stat.st_mtime_ns,
+                          sorted(options.items())], default=str, ensure_ascii=False)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def read(self, kind, path, loader, **options):
+        """返回 loader() 的结果；命中内存或磁盘缓存时跳过解析"""
+        if not self.enabled:
+            return loader()
+        key = self._key(kind, path, options)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                with profiler.stage('cache_hit', path) as rec:
+                    df = self._entries[key][0]
+                    rec['rows'] = len(df)
+                return df.copy(deep=False)
+
+        df = self._load_from_disk(key, path)
+        persisted = df is not None
+        if df is None:
+            df = loader()
+
+        with self._lock:
+            evicted = self._put(key, df, persisted)
+        # 被挤出内存的表在锁外落盘，不阻塞其他线程的读取
+        for old_key, old_df in evicted:
+            self._spill(old_key, old_df)
+        return df.copy(deep=False)
+
+    def memo(self, kind, path, func):
+        """缓存小型的 JSON 可序列化结果（如 CSV 行数与编码、sheet 列表）"""
+        if not self.enabled:
+            return func()
+        key = self._key(kind, path, {})
+        with self._lock:
+            meta = self._load_meta()
+            if key in meta:
+                return meta[key]
+        # func() 可能要完整读一遍文件，不能持锁计算，否则会阻塞流水线中其他阶段的 read()
+        value = func()
+        with self._lock:
+            return self._load_meta().setdefault(key, value)
+
+    def _put(self, key, df, persisted):
+        """放入内存缓存，返回被挤出且尚未落盘的 (键, 表)，由调用方在锁外写入磁盘"""
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.memory_budget:
+            # 单个表超过预算时不缓存：落盘要把整表再写一遍，多为一次性读取，得不偿失
+            return []
+        evicted = []
+        while self._entries and self._used + size > self.memory_budget:
+            old_key, (old_df, old_size, old_persisted) = self._entries.popitem(last=False)
+            self._used -= old_size
+            if not old_persisted:
+                evicted.append((old_key, old_df))
+        self._entries[key] = (df, size, persisted)
+        self._used += size
+        return evicted
+
+    def _disk_path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def _disable(self, error):
+        """缓存目录不可用时提示一次并关闭缓存，不影响正常读取"""
+        if self.enabled:
+            print(f"⚠️  缓存目录不可用，已关闭解析缓存: {error}")
+            self.enabled = False
+
+    def _spill(self, key, df):
+        if not self.enabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            self._disable(e)
+            return
+        try:
+            df.to_parquet(self._disk_path(key, '.parquet'), index=False)
+            return
+        except Exception:
+            # 未安装 pyarrow，或包含 Parquet 不支持的列名/混合类型
+            parquet = self._disk_path(key, '.parquet')
+            if os.path.exists(parquet):
+                os.remove(parquet)
+        try:
+            df.to_pickle(self._disk_path(key, '.pkl'))
+        except OSError as e:
+            self._disable(e)
+        except Exception as e:
+            print(f"⚠️  缓存写入失败: {e}")
+
+    def _load_from_disk(self, key, path):
+        parquet = self._disk_path(key, '.parquet')
+        pkl = self._disk_path(key, '.pkl')
+        if not os.path.exists(parquet) and not os.path.exists(pkl):
+            return None
+        try:
+            with profiler.stage('cache_load', path) as rec:
+                if os.path.exists(parquet):
+                    df = pd.read_parquet(parquet)
+                else:
+                    df = pd.read_pickle(pkl)
+                rec['rows'] = len(df)
+            return df
+        except Exception as e:
+            print(f"⚠️  缓存读取失败，将重新解析: {e}")
+            return None
+
+    def _load_meta(self):
+        if self._meta is None:
+            try:
+                with open(os.path.join(self.cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+                    self._meta = json.load(f)
+            except (OSError, ValueError):
+                self._meta = {}
+        return self._meta
+
+    def flush(self):
+        """把尚未落盘的缓存写入磁盘，并按修改时间清理超出磁盘预算的旧缓存"""
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, (df, size, persisted) in list(self._entries.items()):
+                if not persisted:
+                    self._spill(key, df)
+                    self._entries[key] = (df, size, True)
+            if not self.enabled:
+                return
+            try:
+                if self._meta:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    with open(os.path.join(self.cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+                        json.dump(self._meta, f, ensure_ascii=False)
+                self._prune()
+            except OSError as e:
+                self._disable(e)
+
+    def _prune(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                 if name.endswith(('.parquet', '.pkl'))]
+        files.sort(key=os.path.getmtime, reverse=True)
+        total = 0
+        for path in files:
+            total += os.path.getsize(path)
+            if total > self.disk_budget:
+                os.remove(path)
+
+
+table_cache = TableCache()
+atexit.register(table_cache.flush)
+
+
+def compact_string_columns(df, max_unique_ratio=0.5):
+    """将重复值较多的文本列转为 category（字典编码），降低内存占用"""
+    n_rows = len(df)
+    if n_rows == 0:
+        return df
+    for col in df.columns:
+        series = df[col]
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            continue
+        if series.nunique(dropna=False) <= n_rows * max_unique_ratio:
+            df[col] = series.astype('category')
+    return df
+
+
+def cached_sheet_names(path):
+    return table_cache.memo('sheets', path, lambda: excel_sheet_names(path))
+
+
+def read_standard_table(path, sheet_name=None, encoding=None):
+    """
+    各工具共用的标准解析，每个文件（每个 sheet）只缓存这一份：
+    CSV 按检测到的编码读取，所有列为字符串；Excel 保留单元格原始值（数字、日期等），
+    字符串列无法还原出日期单元格，因此 Excel 以原始值为准。各工具需要的列和类型由 cached_read_table 派生。
+    """
+    if table_ext(path) == '.csv':
+        return table_cache.read('csv', path, lambda: read_csv_detected(path, encoding, dtype=str))
+    if sheet_name is None:
+        sheet_name = cached_sheet_names(path)[0]
+    return table_cache.read('excel', path, lambda: read_excel_any(path, sheet_name=sheet_name, dtype=object),
+                            sheet_name=sheet_name)
+
+
+CSV_BOOL_VALUES = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+
+
+def infer_text_column(col):
+    """按 read_csv 的规则推断字符串列的类型：全为数字转为整数/浮点（含空值的整数列为浮点），全为 True/False 转为布尔"""
+    if not col.hasnans:
+        # 整数列的快速路径；int() 还接受全角数字和 1_000，这类写法 read_csv 按文本处理
+        try:
+            ints = col.astype('int64')
+        except (ValueError, TypeError, OverflowError):
+            ints = None
+        if ints is not None:
+            text = ''.join(col.to_numpy())
+            if text.isascii() and '_' not in text:
+                return ints
+    try:
+        # 浮点必须用 to_numeric：它与 read_csv 使用同一套解析，float() 在末位上可能不同
+        return pd.to_numeric(col)
+    except (ValueError, TypeError):
+        pass
+    values = col.dropna()
+    if len(values) and values.iloc[0] in CSV_BOOL_VALUES and values.isin(CSV_BOOL_VALUES).all():
+        # 与 read_csv 一致：含空值的布尔列为 object
+        return col.map(CSV_BOOL_VALUES).astype(bool if len(values) == len(col) else object)
+    return col
+
+
+def infer_excel_types(df):
+    """按 read_excel 的规则由单元格原始值推断列类型（与 read_excel 内部一样交给 TextParser）"""
+    from pandas.io.parsers import TextParser
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+    return TextParser(rows, header=None, names=list(df.columns)).read()
+
+
+def derive_table(df, path, usecols, typed):
+    if usecols is not None:
+        missing = [col for col in usecols if col not in df.columns]
+        if missing:
+            raise ValueError(f"以下列在文件中未找到: {missing}")
+        df = df[[col for col in df.columns if col in set(usecols)]]
+    is_csv = table_ext(path) == '.csv'
+    if typed:
+        with profiler.stage('infer_types', path) as rec:
+            rec['rows'] = len(df)
+            if not is_csv:
+                return infer_excel_types(df)
+            df = df.copy(deep=False)
+            for i in range(len(df.columns)):
+                df.isetitem(i, infer_text_column(df.iloc[:, i]))
+            return df
+    return df if is_csv else df.astype('str')
+
+
+def cached_read_table(path, sheet_name=None, usecols=None, typed=False, compact=False, encoding=None):
+    """
+    读取表格，不同工具、不同列选择共用同一份缓存的标准解析（read_standard_table）。
+    usecols 只保留这些列（保持文件中的顺序）；typed=True 时列类型与直接整表读入一致，
+    否则所有列为字符串（空单元格保持为空值）；compact=True 时把重复值较多的文本列转为 category。
+    CSV 的 encoding 为空时自动检测。
+    """
+    if table_cache.enabled:
+        df = derive_table(read_standard_table(path, sheet_name, encoding), path, usecols, typed)
+    elif table_ext(path) == '.csv':
+        # 不使用缓存时直接按所需的列和类型解析，省去派生的开销
+        df = read_csv_detected(path, encoding, usecols=usecols, dtype=None if typed else str)
+    else:
+        df = read_excel_any(path, sheet_name=sheet_name or 0, usecols=usecols, dtype=None if typed else str)
+    return compact_string_columns(df.copy(deep=False)) if compact else df
+
+
+# ========================
+# 流水线
+# ========================
+
+PIPELINE_QUEUE_SIZE = 2
+_PIPELINE_DONE = object()
+
+
+def _pipeline_apply(func, upstream):
+    return func(upstream.result())
+
+
+def run_pipeline(source, stages=(), queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    读取 -> 处理 -> 写出 的分阶段流水线，各阶段在独立线程中运行，通过有界队列连接。
+    source 在预取线程中迭代；stages 中每项为函数或 (函数, 线程数)；
+    调用方迭代返回的生成器即为写出阶段，结果顺序与输入一致。
+    队列满时上游阻塞（背压），因此同时驻留内存的数据块数量有上限。
+    任一阶段抛出的异常会在调用方迭代到对应结果时重新抛出。
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _PIPELINE_DONE
+
+    def feed():
+        try:
+            for item in source:
+                future = Future()
+                future.set_result(item)
+                if not put(queues[0], future):
+                    return
+        except BaseException as e:
+            future = Future()
+            future.set_exception(e)
+            put(queues[0], future)
+        put(queues[0], _PIPELINE_DONE)
+
+    def dispatch(func, workers, q_in, q_out):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while True:
+                upstream = get(q_in)
+                if upstream is _PIPELINE_DONE:
+                    break
+                if not put(q_out, pool.submit(_pipeline_apply, func, upstream)):
+                    break
+        put(q_out, _PIPELINE_DONE)
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    for i, stage in enumerate(stages):
+        func, workers = stage if isinstance(stage, tuple) else (stage, 1)
+        threads.append(threading.Thread(target=dispatch, args=(func, workers, queues[i], queues[i + 1]),
+                                        daemon=True))
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            future = queues[-1].get()
+            if future is _PIPELINE_DONE:
+                return
+            yield future.result()
+    finally:
+        stop.set()
+
+
+def profiled_chunks(reader, path):
+    """包装分块读取器，把每块的解析耗时记为 parse 阶段（作为流水线的 source 使用）"""
+    while True:
+        with profiler.stage('parse', path) as rec:
+            chunk = next(reader, None)
+            rec['rows'] = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        yield chunk
+
+
+# ========================
+# 执行计划
+# ========================
+
+PLAN_STRATEGIES = {
+    'memory': '整表读入内存',
+    'streaming': '分块流式处理',
+    'parallel': '多进程并行',
+    'spill': '分块处理，结果先落盘到临时 CSV',
+}
+# 整表处理时峰值内存相对于数据本身的倍数（中间拷贝、拼接、写出缓冲）
+PLAN_MEMORY_OVERHEAD = {'merge': 2.5, 'split': 2.0, 'dedup': 2.0, 'clean': 2.5}
+# Excel 只能整表解析，openpyxl 的单元格对象另有开销
+EXCEL_PARSE_OVERHEAD = 3
+# 压缩 CSV 无法廉价得知解压后大小时假设的压缩比
+PLAN_COMPRESSION_RATIO = 8
+# 无法嗅探时，内存占用按文件大小的倍数估算
+PLAN_FALLBACK_EXPANSION = 10
+PLAN_SAMPLE_BYTES = 256 * 1024
+PLAN_DEFAULT_MEMORY = 4 * 2 ** 30
+PLAN_MIN_CHUNK_ROWS = 10_000
+PLAN_MAX_CHUNK_ROWS = 1_000_000
+
+
+def available_memory():
+    """当前可用物理内存（字节）：优先 psutil，其次 /proc/meminfo、sysconf，都不可用时返回默认值"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        # MemAvailable 含可回收的页缓存；SC_AVPHYS_PAGES 只是 MemFree，在页缓存多的机器上严重偏小
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return PLAN_DEFAULT_MEMORY
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def sniff_csv(path, info):
+    archive, member = split_archive_member(path)
+    if member is not None:
+        with zipfile.ZipFile(archive) as zf:
+            text_bytes = zf.getinfo(member).file_size
+    elif compression_of(path) is None:
+        text_bytes = info['bytes']
+    else:
+        text_bytes = None
+
+    with open_binary_source(path) as f:
+        sample = f.read(PLAN_SAMPLE_BYTES)
+        complete = not f.read(1)
+    if complete:
+        text_bytes = len(sample)
+    else:
+        sample = sample[:sample.rfind(b'\n') + 1] or sample
+    if text_bytes is None:
+        text_bytes = info['bytes'] * PLAN_COMPRESSION_RATIO
+
+    for encoding in ('utf-8', 'gbk', 'latin1'):
+        try:
+            # 按字符串解析，得到偏大的（安全的）内存估计
+            df = pd.read_csv(io.BytesIO(sample), dtype=str, encoding=encoding, on_bad_lines='skip')
+            break
+        except UnicodeDecodeError:
+            continue
+    info['columns'] = len(df.columns)
+    if len(df):
+        info['rows'] = int(text_bytes / (len(sample) / (len(df) + 1)))
+        info['row_bytes'] = df.memory_usage(deep=True).sum() / len(df)
+        info['memory'] = info['rows'] * info['row_bytes']
+
+
+def sniff_excel(path, info):
+    from openpyxl import load_workbook
+    wb = load_workbook(_excel_source(path), read_only=True)
+    try:
+        ws = wb.worksheets[0]
+        info['columns'] = ws.max_column or 0
+        info['rows'] = max((ws.max_row or 1) - 1, 0)
+    finally:
+        wb.close()
+    df = read_excel_any(path, nrows=200, dtype=str)
+    if len(df) and info['rows']:
+        info['row_bytes'] = df.memory_usage(deep=True).sum() / len(df)
+        info['memory'] = info['rows'] * info['row_bytes'] * EXCEL_PARSE_OVERHEAD
+
+
+def sniff_input(path):
+    """
+    读取文件开头估算规模，返回 {路径, 格式, 字节数, 列数, 估计行数, 每行内存, 估计内存}。
+    CSV 解析开头约 256KB 的样本；xlsx 从工作表尺寸读取行列数，再解析前 200 行。
+    无法嗅探时按文件大小的固定倍数估算。
+    """
+    info = {'path': path, 'ext': table_ext(path), 'bytes': source_size(path),
+            'columns': 0, 'rows': 0, 'row_bytes': 0, 'memory': None}
+    try:
+        if info['ext'] == '.csv':
+            sniff_csv(path, info)
+        elif info['ext'] == '.xlsx':
+            sniff_excel(path, info)
+    except Exception:
+        pass
+    if info['memory'] is None:
+        info['memory'] = info['bytes'] * PLAN_FALLBACK_EXPANSION
+    return info
+
+
+class ExecutionPlan:
+    """一次操作的执行方式：策略、分块行数、并行数和预计峰值内存"""
+
+    def __init__(self, operation, strategy, chunk_rows, workers, peak_memory, budget, inputs, note=None):
+        self.operation = operation
+        self.strategy = strategy
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.peak_memory = peak_memory
+        self.budget = budget
+        self.inputs = inputs
+        self.note = note
+
+    @property
+    def in_memory(self):
+        return self.strategy in ('memory', 'parallel')
+
+    def describe(self):
+        detail = PLAN_STRATEGIES[self.strategy]
+        if self.strategy in ('streaming', 'spill'):
+            detail += f"（每块 {self.chunk_rows:,} 行）"
+        elif self.strategy == 'parallel':
+            detail += f"（{self.workers} 个进程）"
+        total_bytes = sum(i['bytes'] for i in self.inputs)
+        rows = sum(i['rows'] for i in self.inputs)
+        columns = max((i['columns'] for i in self.inputs), default=0)
+        print(f"\n🧭 执行计划: {detail}")
+        print(f"   输入 {len(self.inputs)} 个文件，共 {format_bytes(total_bytes)}，"
+              f"约 {rows:,} 行，最多 {columns} 列")
+        print(f"   预计峰值内存 ≈ {format_bytes(self.peak_memory)}"
+              f"（内存预算 {format_bytes(self.budget)}，CPU {available_cpus()} 核）")
+        if self.note:
+            print(f"   {self.note}")
+
+
+class Planner:
+    """
+    每次合并/分割/查重/清理前，根据输入大小、格式、列数、可用内存和 CPU 数选择执行方式。
+    strategy / chunk_rows / workers 不为 None 时覆盖自动选择（--plan、--chunk-rows、--workers）。
+    """
+
+    def __init__(self):
+        self.strategy = None
+        self.chunk_rows = None
+        self.workers = None
+        self.memory_fraction = 0.5  # 可用内存中允许本程序使用的比例
+
+    def plan(self, operation, paths, supports=('memory',), max_workers=1, shared_bytes=0, sequential=False):
+        """
+        supports 为该操作在这些输入上可用的策略；max_workers 为并行的上限；
+        shared_bytes 为与输入无关、始终驻留的数据（如查重的对比值集合）；
+        sequential 表示整表处理时各输入逐个读入、用完即释放（如批量查重），只按最大的输入估算。
+        """
+        with profiler.stage('plan') as rec:
+            inputs = [sniff_input(p) for p in paths]
+            rec['bytes'] = sum(i['bytes'] for i in inputs)
+        budget = available_memory() * self.memory_fraction
+        cpus = available_cpus()
+        overhead = PLAN_MEMORY_OVERHEAD[operation]
+
+        # 每块约占预算的 1/16（16MB~256MB），按最宽的输入换算为行数
+        row_bytes = max((i['row_bytes'] for i in inputs), default=0) or 1024
+        chunk_bytes = min(max(budget / 16, 16 * 2 ** 20), 256 * 2 ** 20)
+        chunk_rows = int(min(max(chunk_bytes / row_bytes, PLAN_MIN_CHUNK_ROWS), PLAN_MAX_CHUNK_ROWS))
+        chunk_rows = self.chunk_rows or chunk_rows // PLAN_MIN_CHUNK_ROWS * PLAN_MIN_CHUNK_ROWS
+
+        largest = max((i['memory'] for i in inputs), default=0) * overhead
+        # Excel 无法分块，流式处理时仍需整表解析
+        largest_excel = max((i['memory'] for i in inputs if i['ext'] != '.csv'), default=0) * overhead
+        fits = max(int((budget - shared_bytes) // max(largest, 1)), 1)
+        parallel_workers = min(cpus, max_workers, len(inputs), fits)
+        parallel_workers = max(self.workers or parallel_workers, 1)
+        # 输入比一块还小时，一块只有实际的行数；未能嗅探出行数的输入按整块估算
+        block_rows = min(chunk_rows, max((i['rows'] if i['row_bytes'] else chunk_rows
+                                          for i in inputs if i['ext'] == '.csv'), default=0))
+        streaming_peak = block_rows * row_bytes * overhead * (PIPELINE_QUEUE_SIZE + 2) + largest_excel + shared_bytes
+        whole = largest if sequential else sum(i['memory'] for i in inputs) * overhead
+        estimates = {
+            'memory': whole + shared_bytes,
+            'streaming': streaming_peak,
+            'spill': streaming_peak,
+            'parallel': largest * parallel_workers + shared_bytes,
+        }
+
+        note = None
+        if self.strategy and self.strategy not in supports:
+            note = f"⚠️  指定的策略 {self.strategy} 不适用于此操作，已改为自动选择。"
+        if self.strategy in supports:
+            strategy = self.strategy
+            note = "（策略由 --plan / XLSXSELECTOR_PLAN 指定）"
+        elif 'parallel' in supports and parallel_workers >= 2 and estimates['parallel'] <= budget:
+            strategy = 'parallel'
+        elif 'memory' in supports and estimates['memory'] <= budget:
+            strategy = 'memory'
+        elif 'streaming' in supports:
+            strategy = 'streaming'
+        elif 'spill' in supports:
+            strategy = 'spill'
+        else:
+            strategy = supports[0]
+            if estimates[strategy] > budget:
+                reason = "Excel 输入无法分块读取" if largest_excel else "此操作不支持分块处理"
+                note = f"⚠️  预计内存超出预算，但只能整表处理（{reason}）。"
+
+        if strategy == 'parallel':
+            workers = parallel_workers
+        else:
+            workers = max(self.workers or min(cpus, max_workers), 1)
+        plan = ExecutionPlan(operation, strategy, chunk_rows, workers, estimates[strategy], budget, inputs, note)
+        plan.describe()
+        return plan
+
+
+planner = Planner()
+
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def spill_to_xlsx(csv_path, xlsx_path, sheet_name="Sheet1", dtype=None, chunk_rows=100_000):
+    """把落盘的临时 CSV 逐块写入只写模式的工作簿，内存占用与行数无关"""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    rows = 0
+    with pd.read_csv(csv_path, encoding='utf-8-sig', dtype=dtype, chunksize=chunk_rows) as reader:
+        header_written = False
+        for chunk in reader:
+            if not header_written:
+                ws.append([str(c) for c in chunk.columns])
+                header_written = True
+            rows += len(chunk)
+            if rows >= EXCEL_MAX_ROWS:
+                raise ValueError(f"数据行数超出 Excel 单表上限 {EXCEL_MAX_ROWS - 1:,} 行，请改用 CSV 输出")
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                ws.append(row)
+        if not header_written:
+            ws.append(pd.read_csv(csv_path, encoding='utf-8-sig', nrows=0).columns.tolist())
+    wb.save(xlsx_path)
+    return rows
+
+
+def infer_csv_dtypes(path, chunk_rows, **kwargs):
+    """
+    分块扫描 CSV，得到与整表读入时一致的列类型（分块处理后写出 Excel 时使用）：
+    各块类型相同则沿用；整数与浮点混合（部分块含空值）为 float64；其余混合按文本处理。
+    """
+    found = {}
+    with read_csv_any(path, chunksize=chunk_rows, **kwargs) as reader:
+        for chunk in reader:
+            for col, dtype in chunk.dtypes.items():
+                found.setdefault(col, set()).add(dtype)
+    return {col: common_dtype(kinds) for col, kinds in found.items()}
+
+
+def common_dtype(dtypes):
+    """多块（或多个文件）中同一列的类型合并为一个：相同则沿用，整数与浮点混合为 float64，其余按文本"""
+    dtypes = set(dtypes)
+    if len(dtypes) == 1:
+        return dtypes.pop()
+    if all(isinstance(dtype, np.dtype) and dtype.kind in 'iuf' for dtype in dtypes):
+        return np.dtype('float64')
+    return str
+
+
+def partial_path(output_file):
+    """输出文件旁的临时文件名，保留原后缀（压缩格式按后缀识别）"""
+    folder, name = os.path.split(output_file)
+    return os.path.join(folder, f".partial-{name}")
+
+
+class ChunkWriter:
+    """
+    分块写出一个 CSV/XLSX 文件，流式合并、分割、查重、清理共用。
+    dtypes 为输出各列的类型，必须显式给出，且应与整表读入时一致：写入的各块应已按此类型读取，
+    xlsx 输出先落盘为临时 CSV，关闭时按 dtypes 读回并逐块写入工作簿。
+    新建输出时先写入输出旁的临时文件，成功后再替换目标，失败时目标保持不变；
+    CSV 追加时记录原文件大小，失败时截断回原大小，避免下次运行重复追加。
+    """
+
+    def __init__(self, output_file, columns, dtypes, sheet_name="Sheet1", append=False):
+        self.output_file = output_file
+        self.is_csv = table_ext(output_file) == '.csv'
+        self.columns = columns
+        self.dtypes = dtypes
+        self.sheet_name = sheet_name
+        self.append = append
+        self.rows = 0
+        self._spill_dir = None
+        self._partial = partial_path(output_file)
+        self._original_size = None
+        if not self.is_csv:
+            self._spill_dir = tempfile.mkdtemp(prefix="xlsxselector_spill_")
+            self._target = os.path.join(self._spill_dir, "spill.csv")
+        elif append:
+            self._original_size = os.path.getsize(output_file)
+            self._target = output_file
+        else:
+            self._target = self._partial
+        self._started = self.append and self.is_csv
+
+    def write(self, df):
+        with profiler.stage('write', self.output_file) as rec:
+            write_csv(df, self._target, append=self._started, header=not self._started)
+            rec['rows'] = len(df)
+        self._started = True
+        self.rows += len(df)
+
+    def close(self):
+        try:
+            if not self._started:
+                self.write(pd.DataFrame(columns=self.columns))
+            if self.is_csv:
+                if not self.append:
+                    os.replace(self._partial, self.output_file)
+                return
+            with profiler.stage('write', self.output_file) as rec:
+                if self.append:
+                    df = pd.read_csv(self._target, encoding='utf-8-sig', dtype=self.dtypes)
+                    shutil.copyfile(self.output_file, self._partial)
+                    append_to_merge_output(df, self._partial, '.xlsx')
+                else:
+                    spill_to_xlsx(self._target, self._partial, self.sheet_name, dtype=self.dtypes)
+                os.replace(self._partial, self.output_file)
+                rec['rows'] = self.rows
+                rec['bytes'] = os.path.getsize(self.output_file)
+        except BaseException:
+            self.discard()
+            raise
+        finally:
+            self._remove_spill()
+
+    def discard(self):
+        """放弃本次写出：删除临时文件，追加模式下把输出截断回原大小"""
+        self._remove_spill()
+        if os.path.exists(self._partial):
+            os.remove(self._partial)
+        if self._original_size is not None:
+            with open(self.output_file, 'r+b') as f:
+                f.truncate(self._original_size)
+
+    def _remove_spill(self):
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+
 # ========================
 # 合并功能
 # ========================
@@ -57,9 +1207,10 @@ def merge_files():
             return
         file_paths = paths_input.split()
         for fp in file_paths:
-            if not os.path.exists(fp):
+            if not path_exists(fp):
                 print(f"❌ 文件不存在: {fp}")
                 return
+        file_paths = expand_archives(file_paths)
     else:
         folder_path = input("请输入文件夹路径: ").strip()
         if not folder_path:
@@ -69,11 +1220,10 @@ def merge_files():
             return
 
         folder = Path(folder_path)
-        file_paths = list(folder.glob("*.csv")) + list(folder.glob("*.xlsx")) + list(folder.glob("*.xls"))
-        file_paths = [str(p) for p in file_paths]
+        file_paths = expand_archives([str(p) for pattern in INPUT_GLOBS for p in folder.glob(pattern)])
 
         if not file_paths:
-            print(f"❌ 在 {folder_path} 中未找到 .csv 或 Excel 文件！")
+            print(f"❌ 在 {folder_path} 中未找到 .csv、Excel 或压缩文件！")
             return
 
         print(f"✅ 找到 {len(file_paths)} 个文件:")
@@ -85,49 +1235,63 @@ def merge_files():
     if sort_choice == 'y':
         file_paths.sort()
 
-    # 3. 读取文件
+    # 2.1 增量合并：先确定输出文件，对照清单只读取新增/变化的文件
+    incremental = get_user_choice(
+        "是否启用增量合并（只读取新增文件并追加到已有输出）？(y/n, 默认 n): ", ['y', 'n'], 'n') == 'y'
+    manifest = None
+    skipped = {}  # 未变化、无需重新读取的文件 -> 清单条目
+    rebuild = False
+    output_file = output_ext = None
+    if incremental:
+        output_file, output_ext = prompt_merge_output()
+        manifest = load_merge_manifest(output_file)
+        if manifest is None or not os.path.exists(output_file):
+            print("ℹ️  未找到已有输出或合并清单，将完整合并并生成清单。")
+            manifest = None
+        else:
+            unchanged, new, changed, removed = classify_merge_inputs(file_paths, manifest)
+            print(f"📒 合并清单: 未变化 {len(unchanged)} 个, 新增 {len(new)} 个, "
+                  f"已修改 {len(changed)} 个, 已移除 {len(removed)} 个")
+            if changed or removed:
+                for fp in changed:
+                    print(f"   ✏️  已修改: {fp}")
+                for fp in removed:
+                    print(f"   🗑️  已移除: {fp}")
+                print("⚠️  存在已修改或已移除的文件，将完整重建输出。")
+                rebuild = True
+            else:
+                skipped = unchanged
+
+    # 3. 读取文件：按规模选择整表读入或分块流式合并
     dataframes = []
     all_columns = set()
     common_columns = None
+    to_read = [fp for fp in file_paths if fp not in skipped]
+    encodings = {}
+    plan = planner.plan('merge', to_read or file_paths, supports=('memory', 'streaming', 'spill'))
 
     print("\n正在读取文件...")
     for file in file_paths:
-        ext = os.path.splitext(file)[1].lower()
-        try:
-            if ext == '.csv':
-                total_lines, encoding = count_csv_lines(file)
-                if total_lines is None:
-                    print(f"❌ 无法读取文件（编码不支持）: {file}")
-                    continue
-                print(f"🔍 使用编码 {encoding} 读取 {os.path.basename(file)}")
-                df = pd.read_csv(file, encoding=encoding)
-                data_rows = len(df)
-                print(f"✓ {os.path.basename(file)}: "
-                      f"总行数（含表头）= {total_lines} 行, "
-                      f"实际数据行 = {data_rows} 行, "
-                      f"列数 = {len(df.columns)}")
-            elif ext in ['.xlsx', '.xls']:
-                df = pd.read_excel(file)
-                data_rows = len(df)
-                total_lines = data_rows + 1
-                print(f"✓ {os.path.basename(file)}: "
-                      f"总行数（含表头）≈ {total_lines} 行 (估算), "
-                      f"实际数据行 = {data_rows} 行, "
-                      f"列数 = {len(df.columns)}")
-            else:
-                print(f"跳过不支持的格式: {file}")
-                continue
-
-            dataframes.append((file, df))
-            all_columns.update(df.columns)
-            if common_columns is None:
-                common_columns = set(df.columns)
-            else:
-                common_columns &= set(df.columns)
-        except Exception as e:
-            print(f"❌ 读取失败 {file}: {type(e).__name__}: {e}")
+        if file in skipped:
+            print(f"⏭️  {os.path.basename(file)}: 未变化，跳过读取")
+    if plan.in_memory:
+        dataframes = list(load_merge_inputs(to_read))
+        columns_by_file = {file: df.columns for file, df in dataframes}
+    else:
+        # 流式合并：此处只读取表头，数据在合并时分块读取
+        columns_by_file = dict(load_merge_headers(to_read, encodings))
+    loaded_files = list(columns_by_file)
+    order = {fp: i for i, fp in enumerate(file_paths)}
+    columns_by_file.update({file: entry['columns'] for file, entry in skipped.items()})
+    for file in sorted(columns_by_file, key=order.get):
+        file_columns = columns_by_file[file]
+        all_columns.update(file_columns)
+        if common_columns is None:
+            common_columns = set(file_columns)
+        else:
+            common_columns &= set(file_columns)
 
-    if not dataframes:
+    if not columns_by_file:
         print("❌ 没有成功读取任何文件！")
         return
 
@@ -173,72 +1337,548 @@ def merge_files():
     print("   （空字符串、空格、制表符等将被视为缺失值）")
     clean_empty = get_user_choice("是否删除？(y/n, 默认 y): ", ['y', 'n'], 'y') == 'y'
 
+    # 6.1 按关键列去重
+    dedup_keys, dedup_keep = prompt_merge_dedup(final_columns)
+
+    # 6.2 增量合并：列选择或处理方式变化时需要完整重建
+    settings = {
+        'selected_columns': selected_columns,
+        'column_mapping': column_mapping,
+        'clean_empty': clean_empty,
+        'output_ext': output_ext,
+    }
+    if dedup_keys:
+        settings['dedup_keys'] = dedup_keys
+        settings['dedup_keep'] = dedup_keep
+    # 与 JSON 清单中的格式保持一致后再比较（如非字符串列名）
+    settings = json.loads(json.dumps(settings, ensure_ascii=False, default=str))
+    append_mode = manifest is not None and not rebuild
+    if append_mode and manifest.get('settings') != settings:
+        print("⚠️  列选择或处理方式与上次合并不同，将完整重建输出。")
+        append_mode = False
+    if append_mode and not loaded_files:
+        print("✅ 没有新增文件，输出已是最新。")
+        return
+    seen_keys = np.empty(0, dtype=np.uint64)
+    if append_mode and dedup_keys:
+        if dedup_keep == 'last':
+            print("⚠️  保留最后出现的行时，新增文件可能替换已输出的行，将完整重建输出。")
+            append_mode = False
+        else:
+            seen_keys = load_merge_keys(output_file)
+            if seen_keys is None:
+                print("⚠️  未找到已输出行的关键列记录，将完整重建输出。")
+                seen_keys = np.empty(0, dtype=np.uint64)
+                append_mode = False
+    if dedup_keys and dedup_keep == 'last' and not plan.in_memory:
+        # 保留最后出现的行需要倒序处理各文件，无法分块流式进行
+        print("⚠️  保留最后出现的行需要整表读入，改为在内存中合并。")
+        plan.strategy = 'memory'
+        dataframes = list(load_merge_inputs(loaded_files))
+    if skipped and not append_mode:
+        print("\n正在读取此前跳过的文件...")
+        if plan.in_memory:
+            dataframes.extend(load_merge_inputs(list(skipped)))
+            dataframes.sort(key=lambda item: order[item[0]])
+        else:
+            loaded_files = sorted(loaded_files + list(skipped), key=order.get)
+
     # 7. 合并
     merged_rows = 0
-    combined_df = pd.DataFrame(columns=final_columns)
+    rows_per_file = {}
+    duplicate_rows = {}
+    input_rows = {}
+    merged_frames = []
+    sink = None
+    if not plan.in_memory:
+        # 流式合并边读边写，需要先确定输出
+        if output_file is None:
+            output_file, output_ext = prompt_merge_output()
+        if output_ext != ".csv":
+            plan.strategy = 'spill'
+            print("ℹ️  XLSX 输出：合并结果先写入临时 CSV，最后逐块写入工作簿。")
+        file_dtypes = load_merge_dtypes(loaded_files, plan.chunk_rows, encodings, selected_columns,
+                                        excel=output_ext != ".csv")
+        if output_ext == ".csv":
+            # CSV 输出逐块写出后不再读回，各块按文件类型读取即可，输出类型只是占位
+            output_dtypes = dict.fromkeys(final_columns, str)
+        else:
+            output_dtypes = merge_output_dtypes(file_dtypes, selected_columns, column_mapping)
+        sink = ChunkWriter(output_file, final_columns, output_dtypes, "MergedData", append=append_mode)
+        rows_per_file = {file: 0 for file in loaded_files}
 
     print("\n🔄 正在合并数据...")
 
-    for i, (file, df) in enumerate(dataframes):
+    def transform(item):
+        file, df = item
+        input_rows[file] = input_rows.get(file, 0) + len(df)
         temp_df = df.reindex(columns=selected_columns)
         temp_df.columns = final_columns
 
         if clean_empty:
-            temp_df.replace(r'^\s*$', np.nan, regex=True, inplace=True)
-            temp_df.dropna(how='all', inplace=True)
+            with profiler.stage('blank_drop', file) as rec:
+                rec['rows'] = len(temp_df)
+                temp_df.replace(r'^\s*$', np.nan, regex=True, inplace=True)
+                temp_df.dropna(how='all', inplace=True)
+        return file, temp_df, 0
+
+    def drop_duplicate_keys(item):
+        # 单线程按顺序执行，seen_keys 只在此阶段读写
+        nonlocal seen_keys
+        file, temp_df, _ = item
+        with profiler.stage('key_dedup', file) as rec:
+            rec['rows'] = len(temp_df)
+            keep, seen_keys = dedup_by_keys(temp_df, dedup_keys, dedup_keep, seen_keys)
+        return file, temp_df.iloc[keep], len(temp_df) - len(keep)
+
+    stages = [transform]
+    if plan.in_memory:
+        inputs = dataframes
+    else:
+        inputs = iter_merge_chunks(loaded_files, plan.chunk_rows, encodings, file_dtypes)
+    if dedup_keys:
+        stages.append(drop_duplicate_keys)
+        if dedup_keep == 'last':
+            # 保留最后出现的行：按文件倒序处理，合并前再恢复原顺序
+            print("ℹ️  重复行保留最后出现的一条，按文件倒序去重。")
+            inputs = dataframes[::-1]
+
+    # 投影、重命名、删除空行、关键列去重在处理线程中进行，与主线程收集结果（或写出）重叠
+    try:
+        for file, temp_df, duplicates in run_pipeline(inputs, stages):
+            if sink is None:
+                merged_frames.append(temp_df)
+            else:
+                sink.write(temp_df)
+            merged_rows += len(temp_df)
+            rows_per_file[file] = rows_per_file.get(file, 0) + len(temp_df)
+            duplicate_rows[file] = duplicate_rows.get(file, 0) + duplicates
+    except Exception as e:
+        if sink is not None:
+            sink.discard()
+        print(f"❌ 合并失败: {type(e).__name__}: {e}")
+        return
+    # 流式合并时每个文件分多块处理，按文件汇总后再输出
+    for file in sorted(rows_per_file, key=order.get):
+        if dedup_keys:
+            print(f"  ✔️ 已合并: {os.path.basename(file)} -> {rows_per_file[file]} 行"
+                  f"（重复 {duplicate_rows.get(file, 0)} 行）")
+        else:
+            print(f"  ✔️ 已合并: {os.path.basename(file)} -> {rows_per_file[file]} 行")
+    if dedup_keys and dedup_keep == 'last':
+        merged_frames.reverse()
 
-        combined_df = pd.concat([combined_df, temp_df], ignore_index=True)
-        merged_rows += len(temp_df)
-        print(f"  ✔️ 已合并: {os.path.basename(file)} -> {len(temp_df)} 行")
+    if sink is None:
+        # 一次性拼接，避免逐个文件 concat 时反复复制已合并的数据
+        with profiler.stage('concat') as rec:
+            combined_df = pd.concat([pd.DataFrame(columns=final_columns)] + merged_frames, ignore_index=True)
+            rec['rows'] = len(combined_df)
 
     print(f"✅ 合并完成！共合并 {merged_rows} 行数据。")
 
-    expected_data_rows = sum([len(df) for _, df in dataframes])
-    if merged_rows != expected_data_rows:
-        print(f"⚠️  注意：实际合并 {merged_rows} 行，预期 {expected_data_rows} 行。")
-        print(f"    可能原因：检测到 {expected_data_rows - merged_rows} 行全空（或全空白），已被删除。")
+    expected_data_rows = sum(input_rows.values())
+    total_duplicates = sum(duplicate_rows.values())
+    if dedup_keys:
+        print(f"🔑 按关键列 {dedup_keys} 去重，共删除 {total_duplicates} 行重复数据。")
+    if merged_rows + total_duplicates != expected_data_rows:
+        blank_rows = expected_data_rows - merged_rows - total_duplicates
+        print(f"⚠️  注意：实际合并 {merged_rows} 行，预期 {expected_data_rows - total_duplicates} 行。")
+        print(f"    可能原因：检测到 {blank_rows} 行全空（或全空白），已被删除。")
     else:
         print(f"✅ 数据行数匹配，合并完整。")
 
     # 8. 输出
+    if output_file is None:
+        output_file, output_ext = prompt_merge_output()
+
+    # 9. 保存
+    try:
+        if sink is not None:
+            sink.close()
+        else:
+            with profiler.stage('write', output_file) as rec:
+                if append_mode:
+                    append_to_merge_output(combined_df, output_file, output_ext)
+                elif output_ext == ".csv":
+                    write_csv(combined_df, output_file)
+                else:
+                    combined_df.to_excel(output_file, index=False, sheet_name="MergedData")
+                rec['rows'] = len(combined_df)
+                rec['bytes'] = os.path.getsize(output_file)
+        if append_mode:
+            print(f"🎉 已追加 {merged_rows} 行到: {output_file}")
+        elif output_ext == ".csv":
+            print(f"🎉 成功保存为 CSV: {output_file}")
+        else:
+            print(f"🎉 成功保存为 Excel: {output_file}")
+        total_rows = merged_rows
+        if append_mode:
+            total_rows += sum(entry['rows'] for entry in manifest['files'].values())
+        print(f"📊 输出文件总行数（含表头）: {total_rows + 1} 行（数据行数: {total_rows}）")
+    except Exception as e:
+        print(f"❌ 保存失败: {type(e).__name__}: {e}")
+        if incremental and sink is None and os.path.exists(merge_manifest_path(output_file)):
+            # 整表写出失败时输出可能只写了一部分，清单已不可信，下次运行完整重建
+            os.remove(merge_manifest_path(output_file))
+            print("⚠️  已删除合并清单，下次合并将完整重建输出。")
+        return
+
+    if incremental:
+        files = {}
+        if append_mode:
+            files.update(manifest['files'])
+            files.update({os.path.abspath(fp): entry for fp, entry in skipped.items()})
+        for file, rows in rows_per_file.items():
+            files[os.path.abspath(file)] = dict(file_fingerprint(file), rows=rows,
+                                                columns=[str(c) for c in columns_by_file[file]])
+        save_merge_manifest(output_file, {'settings': settings, 'files': files})
+        if dedup_keys and dedup_keep == 'first':
+            save_merge_keys(output_file, seen_keys)
+
+
+def prompt_merge_dedup(columns):
+    """询问是否按关键列去重，返回 (关键列列表或 None, 'first'/'last')"""
+    print("\n🔑 是否按关键列去重？（如同一订单号出现在多个文件中，只保留一行）")
+    if get_user_choice("是否去重？(y/n, 默认 n): ", ['y', 'n'], 'n') == 'n':
+        return None, 'first'
+    while True:
+        keys_input = input(f"请输入关键列（英文逗号分隔，可选: {columns}）: ").strip()
+        keys = [key.strip() for key in keys_input.split(',') if key.strip()]
+        missing = [key for key in keys if key not in columns]
+        if keys and not missing:
+            break
+        print(f"❌ 列不存在: {missing}" if missing else "❌ 至少需要一个关键列！")
+    keep = get_user_choice(
+        "重复时保留: 1) 最先出现的行  2) 最后出现的行（按文件顺序，默认 1）: ", ['1', '2'], '1')
+    return keys, 'last' if keep == '2' else 'first'
+
+
+def key_hashes(df, keys):
+    """
+    关键列的 64 位行哈希。
+    先统一转为字符串（整数值的浮点列先转整数），使不同文件中类型不同的同一键值哈希一致。
+    """
+    columns = {}
+    for key in keys:
+        col = df[key]
+        if pd.api.types.is_float_dtype(col) and (col.dropna() % 1 == 0).all():
+            col = col.astype('Int64')
+        columns[key] = col.astype(str)
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy(dtype=np.uint64)
+
+
+def dedup_by_keys(df, keys, keep, seen):
+    """
+    返回 (保留行的位置, 更新后的 seen)。
+    seen 为已出现键哈希的有序 uint64 数组；文件内重复按 keep 保留第一或最后一行，
+    与 seen 中重复的行全部删除。
+    """
+    hashes = key_hashes(df, keys)
+    if keep == 'last':
+        unique, index = np.unique(hashes[::-1], return_index=True)
+        index = len(hashes) - 1 - index
+    else:
+        unique, index = np.unique(hashes, return_index=True)
+    # seen 有序：二分查找判断是否已出现，新键按插入位置写入，避免每块都对整个 seen 重新排序
+    pos = np.searchsorted(seen, unique)
+    found = np.zeros(len(unique), dtype=bool)
+    if len(seen):
+        found = seen[np.minimum(pos, len(seen) - 1)] == unique
+    new = ~found
+    return np.sort(index[new]), np.insert(seen, pos[new], unique[new])
+
+
+def merge_keys_path(output_file):
+    return f"{output_file}.keys.npy"
+
+
+def load_merge_keys(output_file):
+    """读取增量合并时已输出行的关键列哈希，不存在或损坏时返回 None"""
+    try:
+        return np.load(merge_keys_path(output_file))
+    except (OSError, ValueError):
+        return None
+
+
+def save_merge_keys(output_file, seen):
+    np.save(merge_keys_path(output_file), seen)
+
+
+def prompt_merge_output():
+    """询问合并结果的输出格式与路径，返回 (输出路径, 扩展名)"""
     output_format = get_user_choice("请选择输出格式: 1) CSV  2) XLSX（默认 1）: ", ['1', '2'], '1')
     output_ext = ".xlsx" if output_format == "2" else ".csv"
+    compression = ""
+    if output_ext == ".csv":
+        compression_choice = get_user_choice(
+            "是否压缩 CSV: 1) 不压缩  2) gzip  3) zstd（多线程）  4) xz（默认 1）: ", ['1', '2', '3', '4'], '1')
+        compression = {'1': "", '2': ".gz", '3': ".zst", '4': ".xz"}[compression_choice]
 
     output_file = input("请输入输出文件路径（含文件名）: ").strip()
     if not output_file:
         base_name = "merged_output"
-        output_file = f"{base_name}{output_ext}"
-    elif not output_file.lower().endswith(('.csv', '.xlsx')):
-        output_file += output_ext
+        output_file = f"{base_name}{output_ext}{compression}"
+    elif table_ext(output_file) not in ('.csv', '.xlsx'):
+        output_file += output_ext + compression
+    elif compression and compression_of(output_file) is None:
+        output_file += compression
 
     output_dir = os.path.dirname(output_file)
     if output_dir and not os.path.exists(output_dir):
         os.makedirs(output_dir)
+    return output_file, output_ext
 
-    # 9. 保存
+
+def detect_merge_input(file):
+    """流水线读取阶段：检测 CSV 编码和行数"""
+    info = {'file': file, 'ext': table_ext(file)}
+    if info['ext'] == '.csv':
+        try:
+            with profiler.stage('detect_encoding', file) as rec:
+                info['total_lines'], info['encoding'] = table_cache.memo(
+                    'csv_lines', file, lambda: count_csv_lines(file))
+                rec['bytes'] = source_size(file)
+                rec['rows'] = info['total_lines']
+        except Exception as e:
+            info['error'] = e
+    return info
+
+
+def parse_merge_input(info):
+    """流水线解析阶段：按检测结果解析文件"""
+    file, ext = info['file'], info['ext']
+    if 'error' in info or ext not in ['.csv', '.xlsx', '.xls']:
+        return info
+    if ext == '.csv' and info['total_lines'] is None:
+        return info
     try:
-        if output_ext == ".csv":
-            combined_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-            print(f"🎉 成功保存为 CSV: {output_file}")
-        else:
-            combined_df.to_excel(output_file, index=False, sheet_name="MergedData")
-            print(f"🎉 成功保存为 Excel: {output_file}")
-        print(f"📊 输出文件总行数（含表头）: {len(combined_df) + 1} 行（数据行数: {len(combined_df)}）")
+        with profiler.stage('parse', file) as rec:
+            info['df'] = cached_read_table(file, typed=True, encoding=info.get('encoding'))
+            rec['rows'] = len(info['df'])
+            rec['bytes'] = source_size(file)
     except Exception as e:
-        print(f"❌ 保存失败: {type(e).__name__}: {e}")
+        info['error'] = e
+    return info
+
+
+def load_merge_inputs(files):
+    """
+    依次读取待合并的文件并打印行数信息，产出 (文件, DataFrame)。
+    编码检测与解析分属两个流水线阶段，下一个文件的检测与当前文件的解析重叠进行；
+    读取失败或格式不支持的文件会被跳过。
+    """
+    for info in run_pipeline(files, [detect_merge_input, parse_merge_input]):
+        file, ext = info['file'], info['ext']
+        if 'error' in info:
+            e = info['error']
+            print(f"❌ 读取失败 {file}: {type(e).__name__}: {e}")
+            continue
+        if ext == '.csv':
+            if info['total_lines'] is None:
+                print(f"❌ 无法读取文件（编码不支持）: {file}")
+                continue
+            df = info['df']
+            print(f"🔍 使用编码 {info['encoding']} 读取 {os.path.basename(file)}")
+            print(f"✓ {os.path.basename(file)}: "
+                  f"总行数（含表头）= {info['total_lines']} 行, "
+                  f"实际数据行 = {len(df)} 行, "
+                  f"列数 = {len(df.columns)}")
+        elif ext in ['.xlsx', '.xls']:
+            df = info['df']
+            print(f"✓ {os.path.basename(file)}: "
+                  f"总行数（含表头）≈ {len(df) + 1} 行 (估算), "
+                  f"实际数据行 = {len(df)} 行, "
+                  f"列数 = {len(df.columns)}")
+        else:
+            print(f"跳过不支持的格式: {file}")
+            continue
+        yield file, df
+
+
+def load_merge_headers(files, encodings):
+    """流式合并的准备阶段：只读取表头，产出 (文件, 列名)，CSV 编码记入 encodings；失败的文件跳过"""
+    for info in run_pipeline(files, [detect_merge_input]):
+        file, ext = info['file'], info['ext']
+        try:
+            if 'error' in info:
+                raise info['error']
+            if ext == '.csv':
+                if info['total_lines'] is None:
+                    print(f"❌ 无法读取文件（编码不支持）: {file}")
+                    continue
+                columns = read_csv_any(file, encoding=info['encoding'], nrows=0).columns
+                encodings[file] = info['encoding']
+                print(f"✓ {os.path.basename(file)}: 总行数（含表头）= {info['total_lines']} 行, "
+                      f"列数 = {len(columns)}（编码 {info['encoding']}，合并时分块读取）")
+            elif ext in ['.xlsx', '.xls']:
+                columns = read_excel_any(file, nrows=0).columns
+                print(f"✓ {os.path.basename(file)}: 列数 = {len(columns)}（合并时整表读取）")
+            else:
+                print(f"跳过不支持的格式: {file}")
+                continue
+        except Exception as e:
+            print(f"❌ 读取失败 {file}: {type(e).__name__}: {e}")
+            continue
+        yield file, columns
+
+
+def merge_file_encoding(file, encodings):
+    encoding = encodings.get(file)
+    if encoding is None:
+        _, encoding = table_cache.memo('csv_lines', file, lambda: count_csv_lines(file))
+    return encoding
+
+
+def load_merge_dtypes(files, chunk_rows, encodings, selected_columns, excel=True):
+    """
+    流式合并前确定每个文件中选中列的类型（与整表读入时一致），返回 {文件: {列名: 类型}}。
+    CSV 只解析选中的列，分块扫描推断；Excel 整表读入（启用缓存时合并时直接复用），
+    excel=False 时跳过 Excel 文件（整表读入的 Excel 本身类型一致，只有 xlsx 输出需要它们的类型）。
+    """
+    selected = set(selected_columns)
+    file_dtypes = {}
+    for file in files:
+        if table_ext(file) != '.csv' and not excel:
+            continue
+        with profiler.stage('dtype_scan', file) as rec:
+            if table_ext(file) == '.csv':
+                file_dtypes[file] = infer_csv_dtypes(
+                    file, chunk_rows, encoding=merge_file_encoding(file, encodings),
+                    usecols=lambda col: col in selected)
+            else:
+                df = cached_read_table(file, typed=True)
+                file_dtypes[file] = df.dtypes.to_dict()
+                rec['rows'] = len(df)
+    return file_dtypes
+
+
+def merge_output_dtypes(file_dtypes, selected_columns, column_mapping):
+    """合并输出各列的类型：按各文件的类型合并，文件中缺少的列按全空的 float64 计"""
+    return {
+        column_mapping[col]: common_dtype(
+            dtypes.get(col, np.dtype('float64')) for dtypes in file_dtypes.values())
+        for col in selected_columns
+    }
+
+
+def iter_merge_chunks(files, chunk_rows, encodings, file_dtypes):
+    """
+    流式合并的读取端：CSV 按块读取，Excel 整表读取，产出 (文件, DataFrame)。
+    CSV 的选中列按 load_merge_dtypes 得到的类型读取，避免各块分别推断出不同类型（如后面的块含空值时整数变为浮点）。
+    """
+    for file in files:
+        if table_ext(file) != '.csv':
+            with profiler.stage('parse', file) as rec:
+                df = cached_read_table(file, typed=True)
+                rec['rows'] = len(df)
+                rec['bytes'] = source_size(file)
+            yield file, df
+            continue
+        reader = read_csv_any(file, encoding=merge_file_encoding(file, encodings),
+                              dtype=file_dtypes[file], chunksize=chunk_rows)
+        for chunk in profiled_chunks(reader, file):
+            yield file, chunk
+
+
+def hash_file(file_path, block_size=1 << 20):
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(source_path(file_path), 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path):
+    stat = os.stat(source_path(file_path))
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': hash_file(file_path)}
+
+
+def merge_manifest_path(output_file):
+    return f"{output_file}.manifest.json"
+
+
+def load_merge_manifest(output_file):
+    """读取输出文件旁的合并清单，不存在或损坏时返回 None"""
+    path = merge_manifest_path(output_file)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  合并清单无法读取，将完整重建: {e}")
+        return None
+
+
+def save_merge_manifest(output_file, manifest):
+    path = merge_manifest_path(output_file)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        print(f"📒 合并清单已更新: {path}")
+    except OSError as e:
+        print(f"⚠️  合并清单保存失败: {e}")
+
+
+def classify_merge_inputs(file_paths, manifest):
+    """
+    将输入文件与清单对照，返回 (未变化 {路径: 清单条目}, 新增, 已修改, 已移除)。
+    大小与修改时间都一致时直接视为未变化；仅修改时间不同时再比较内容哈希。
+    """
+    entries = manifest.get('files', {})
+    unchanged, new, changed = {}, [], []
+    seen = set()
+    for fp in file_paths:
+        key = os.path.abspath(fp)
+        seen.add(key)
+        entry = entries.get(key)
+        if entry is None:
+            new.append(fp)
+            continue
+        stat = os.stat(source_path(fp))
+        if stat.st_size != entry['size']:
+            changed.append(fp)
+        elif stat.st_mtime == entry['mtime'] or hash_file(fp) == entry['sha256']:
+            unchanged[fp] = dict(entry, mtime=stat.st_mtime)
+        else:
+            changed.append(fp)
+    removed = [key for key in entries if key not in seen]
+    return unchanged, new, changed, removed
+
+
+def append_to_merge_output(df, output_file, output_ext):
+    """将新增行追加到已有的合并结果"""
+    if output_ext == ".csv":
+        # 已有文件开头已写入 BOM，追加部分不再重复写入；压缩文件追加为新的压缩帧
+        write_csv(df, output_file, append=True, header=False)
+    else:
+        with pd.ExcelWriter(output_file, engine='openpyxl', mode='a', if_sheet_exists='overlay') as writer:
+            start_row = writer.sheets["MergedData"].max_row
+            df.to_excel(writer, index=False, header=False, sheet_name="MergedData", startrow=start_row)
 
 
 def count_csv_lines(file_path):
-    encodings = ['utf-8', 'gbk', 'utf-8-sig', 'cp1252', 'latin1']
-    for encoding in encodings:
+    for encoding in CSV_ENCODINGS:
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
+            with io.TextIOWrapper(open_binary_source(file_path), encoding=encoding) as f:
                 return sum(1 for _ in f), encoding
         except:
             continue
     return None, None
 
 
+def count_csv_records(file_path, chunk_rows, **kwargs):
+    """按 CSV 记录计数（不含表头）：只解析第一列，引号内含换行的单元格不会被算作多行"""
+    rows = 0
+    with profiler.stage('count', file_path) as rec:
+        with read_csv_any(file_path, usecols=[0], dtype=str, chunksize=chunk_rows, **kwargs) as reader:
+            for chunk in reader:
+                rows += len(chunk)
+        rec['rows'] = rows
+    return rows
+
+
 # ========================
 # 分割功能
 # ========================
@@ -247,10 +1887,20 @@ def get_file_path(prompt):
     """获取有效的文件路径"""
     while True:
         file_path = input(prompt).strip().replace("'", "").replace('"', '')
-        if not os.path.exists(file_path):
+        if not path_exists(file_path):
             print("错误：文件路径不存在，请重新输入。")
-        elif not (file_path.endswith('.xlsx') or file_path.endswith('.csv')):
-            print("错误：文件格式不支持，请确保是 .xlsx 或 .csv 文件。")
+        elif is_zip_archive(file_path):
+            members = [m for m in zip_table_members(file_path) if table_ext(m) in ('.xlsx', '.csv')]
+            if len(members) == 1:
+                return members[0]
+            if not members:
+                print("错误：压缩包内没有 .xlsx 或 .csv 文件。")
+            else:
+                print(f"压缩包内有多个文件，请以 '压缩包{ZIP_MEMBER_SEP}包内文件' 的形式指定其一：")
+                for m in members:
+                    print(f"  {m}")
+        elif table_ext(file_path) not in ('.xlsx', '.csv'):
+            print("错误：文件格式不支持，请确保是 .xlsx 或 .csv 文件（CSV 可为 .gz/.zst/.xz/.bz2 压缩或位于 zip 包内）。")
         else:
             return file_path
 
@@ -272,55 +1922,58 @@ def get_output_dir(prompt):
             return output_dir
 
 
-def read_and_process_file(file_path):
-    """读取文件并处理列名"""
-    try:
-        if file_path.endswith('.xlsx'):
-            df = pd.read_excel(file_path)
-        else:
-            df = pd.read_csv(file_path, dtype=str, encoding='utf-8', on_bad_lines='skip')
-
-        # 将所有列强制转换为字符串，以保留大数字的精度
-        df = df.astype(str)
-
-        columns = df.columns.tolist()
-        print("\n当前文件的列名如下：")
-        print("['" + "', '".join(columns) + "']")
+def choose_columns(file_path):
+    """读取表头，让用户选择要保留的列及其新名称，返回 (选中的列, 重命名映射)"""
+    if table_ext(file_path) == '.xlsx':
+        columns = read_excel_any(file_path, nrows=0).columns.tolist()
+    else:
+        columns = read_csv_any(file_path, nrows=0, encoding='utf-8').columns.tolist()
 
-        while True:
-            selection_input = input("\n请输入您想保留的列名（以逗号分隔，留空默认选择所有）：").strip()
-            if not selection_input:
-                selected_columns = columns
-            else:
-                selected_columns = [col.strip() for col in selection_input.split(',')]
-                invalid_cols = [col for col in selected_columns if col not in columns]
-                if invalid_cols:
-                    print(f"错误：以下列名不存在：{invalid_cols}，请重新输入。")
-                    continue
-            break
+    print("\n当前文件的列名如下：")
+    print("['" + "', '".join(columns) + "']")
 
-        rename_choice = input("是否需要重命名这些列？(y/n)，留空默认不重命名: ").strip().lower()
-        if rename_choice == 'y':
-            new_names = []
-            for col in selected_columns:
-                new_name = input(f"请输入 '{col}' 的新名称：").strip()
-                new_names.append(new_name if new_name else col)
-            rename_map = dict(zip(selected_columns, new_names))
-            df = df.rename(columns=rename_map)
-            print("\n列名已更新为：['" + "', '".join(new_names) + "']")
-            selected_columns = new_names
+    while True:
+        selection_input = input("\n请输入您想保留的列名（以逗号分隔，留空默认选择所有）：").strip()
+        if not selection_input:
+            selected_columns = columns
         else:
-            print("\n已选择不重命名列。")
-
-        return df[selected_columns]
+            selected_columns = [col.strip() for col in selection_input.split(',')]
+            invalid_cols = [col for col in selected_columns if col not in columns]
+            if invalid_cols:
+                print(f"错误：以下列名不存在：{invalid_cols}，请重新输入。")
+                continue
+        break
 
-    except Exception as e:
-        print(f"读取文件时发生错误：{e}")
-        return None
+    rename_map = {}
+    rename_choice = input("是否需要重命名这些列？(y/n)，留空默认不重命名: ").strip().lower()
+    if rename_choice == 'y':
+        new_names = []
+        for col in selected_columns:
+            new_name = input(f"请输入 '{col}' 的新名称：").strip()
+            new_names.append(new_name if new_name else col)
+        rename_map = dict(zip(selected_columns, new_names))
+        print("\n列名已更新为：['" + "', '".join(new_names) + "']")
+    else:
+        print("\n已选择不重命名列。")
+    return selected_columns, rename_map
 
 
-def slice_by_count(df):
-    """按行数截取"""
+def read_selected_columns(file_path, selected_columns, rename_map):
+    """只解析选中的列；全部按字符串读取以保留大数字的精度，空单元格保持为空值"""
+    with profiler.stage('parse', file_path) as rec:
+        try:
+            df = cached_read_table(file_path, usecols=selected_columns, compact=True)
+        except pd.errors.ParserError:
+            # 含格式错误的行：与流式截取一样跳过这些行（不进入缓存）
+            df = compact_string_columns(read_csv_any(file_path, usecols=selected_columns, dtype=str,
+                                                     encoding='utf-8', on_bad_lines='skip'))
+        rec['rows'] = len(df)
+        rec['bytes'] = source_size(file_path)
+    return df[selected_columns].rename(columns=rename_map)
+
+
+def slice_by_count(total_rows):
+    """按行数截取，返回各段的 (起始行, 结束行)（从 0 开始，不含结束行）"""
     while True:
         try:
             start_row = int(input("\n请输入开始截取的行数（从1开始计数）："))
@@ -328,8 +1981,8 @@ def slice_by_count(df):
                 print("输入无效，请输入一个大于0的整数。")
                 continue
             start_row -= 1  # 转换为0-based索引
-            if start_row >= len(df):
-                print(f"开始行超出文件总行数（{len(df)}），请重新输入。")
+            if start_row >= total_rows:
+                print(f"开始行超出文件总行数（{total_rows}），请重新输入。")
                 continue
             break
         except ValueError:
@@ -355,26 +2008,26 @@ def slice_by_count(df):
         except ValueError:
             print("输入无效，请输入一个大于0的整数。")
 
-    sliced_dfs = []
+    ranges = []
     for i in range(slice_times):
         start = start_row + i * row_count
         end = start + row_count
-        if start >= len(df):
+        if start >= total_rows:
             break
-        sliced_dfs.append(df.iloc[start:end])
-    return sliced_dfs
+        ranges.append((start, min(end, total_rows)))
+    return ranges
 
 
-def slice_by_end_row(df):
-    """按行范围截取"""
+def slice_by_end_row(total_rows):
+    """按行范围截取，返回各段的 (起始行, 结束行)（从 0 开始，不含结束行）"""
     while True:
         try:
             start_row = int(input("\n请输入开始截取的行数（从1开始计数）："))
             if start_row <= 0:
                 print("输入无效，请输入一个大于0的整数。")
                 continue
-            if start_row > len(df):
-                print(f"开始行超出文件总行数（{len(df)}），请重新输入。")
+            if start_row > total_rows:
+                print(f"开始行超出文件总行数（{total_rows}），请重新输入。")
                 continue
             break
         except ValueError:
@@ -386,8 +2039,8 @@ def slice_by_end_row(df):
             if end_row <= start_row:
                 print("结束行必须大于开始行。")
                 continue
-            if end_row > len(df) + 1:
-                print(f"结束行超出文件总行数（{len(df)}），请重新输入。")
+            if end_row > total_rows + 1:
+                print(f"结束行超出文件总行数（{total_rows}），请重新输入。")
                 continue
             break
         except ValueError:
@@ -409,12 +2062,47 @@ def slice_by_end_row(df):
     total_rows = end_row - start_row
     slice_length = total_rows // num_slices
 
-    sliced_dfs = []
+    ranges = []
     for i in range(num_slices):
         start = start_row + i * slice_length
-        end = start + slice_length
-        sliced_dfs.append(df.iloc[start:end])
-    return sliced_dfs
+        ranges.append((start, start + slice_length))
+    return ranges
+
+
+def write_slices_in_chunks(file_path, selected_columns, rename_map, ranges, output_paths, chunk_rows):
+    """
+    流式截取：按块读取 CSV，把每块中落在各段行范围内的部分追加到对应的输出文件。
+    按字符串读取，xlsx 输出先写入临时 CSV，每段完成后再逐块写入工作簿。
+    """
+    output_columns = [rename_map.get(col, col) for col in selected_columns]
+    dtypes = dict.fromkeys(output_columns, str)
+    writers = [ChunkWriter(path, output_columns, dtypes) for path in output_paths]
+    offset = 0
+    try:
+        for chunk in run_pipeline(iter_selected_chunks(file_path, selected_columns, rename_map, chunk_rows)):
+            chunk_end = offset + len(chunk)
+            for (start, end), writer in zip(ranges, writers):
+                if start >= chunk_end or end <= offset:
+                    continue
+                writer.write(chunk.iloc[max(start - offset, 0):min(end, chunk_end) - offset])
+            offset = chunk_end
+            if all(end <= offset for _, end in ranges):
+                break
+    except BaseException:
+        for writer in writers:
+            writer.discard()
+        raise
+
+    for writer in writers:
+        try:
+            writer.close()
+            print(f"文件已保存至：{writer.output_file}（{writer.rows} 行）")
+        except Exception as e:
+            print(f"❌ 保存失败 {writer.output_file}: {e}")
+    print("\n所有截取操作已完成！")
+
+
+SPLIT_WRITE_WORKERS = 2
 
 
 def split_excel_or_csv():
@@ -424,25 +2112,54 @@ def split_excel_or_csv():
 
     file_path = get_file_path("请输入您要截取的 Excel 或 CSV 文件路径：")
 
-    processed_df = read_and_process_file(file_path)
-    if processed_df is None:
+    try:
+        selected_columns, rename_map = choose_columns(file_path)
+    except Exception as e:
+        print(f"读取文件时发生错误：{e}")
         return
 
     while True:
         slice_method = input(
-            "\n请选择截取方式：\n1. 指定截取多少行，并重复截取相同行数几次\n2. 指定截取到第几行，并将截取到的部分划为几段\n请选择 (1/2): ").strip()
-        if slice_method == '1':
-            sliced_dataframes = slice_by_count(processed_df)
-            break
-        elif slice_method == '2':
-            sliced_dataframes = slice_by_end_row(processed_df)
+            "\n请选择截取方式：\n1. 指定截取多少行，并重复截取相同行数几次\n2. 指定截取到第几行，并将截取到的部分划为几段"
+            "\n3. 按某一列的值（或其哈希分桶）拆分为多个文件\n请选择 (1/2/3): ").strip()
+        if slice_method in ['1', '2', '3']:
             break
+        print("无效的选择，请重新输入。")
+
+    # CSV 可分块读取（按列值拆分始终流式进行），Excel 只能整表读入
+    if table_ext(file_path) != '.csv':
+        supports = ('memory',)
+    elif slice_method == '3':
+        supports = ('streaming',)
+    else:
+        supports = ('memory', 'streaming')
+    plan = planner.plan('split', [file_path], supports=supports, max_workers=SPLIT_WRITE_WORKERS)
+
+    if slice_method == '3':
+        output_columns = [rename_map.get(col, col) for col in selected_columns]
+        partition_column, buckets = choose_partition(output_columns)
+    else:
+        processed_df = None
+        try:
+            if plan.in_memory:
+                processed_df = read_selected_columns(file_path, selected_columns, rename_map)
+                total_rows = len(processed_df)
+            else:
+                # 与截取时的读取选项一致，行号按记录计算
+                total_rows = table_cache.memo('csv_records', file_path, lambda: count_csv_records(
+                    file_path, plan.chunk_rows, encoding='utf-8', on_bad_lines='skip'))
+                print(f"文件共 {total_rows} 行数据（流式处理，截取时分块读取）。")
+        except Exception as e:
+            print(f"读取文件时发生错误：{e}")
+            return
+        if slice_method == '1':
+            ranges = slice_by_count(total_rows)
         else:
-            print("无效的选择，请重新输入。")
+            ranges = slice_by_end_row(total_rows)
 
-    if not sliced_dataframes:
-        print("未生成任何截取数据，程序结束。")
-        return
+        if not ranges:
+            print("未生成任何截取数据，程序结束。")
+            return
 
     output_dir = get_output_dir("\n请输入保存截取文件的目录地址（留空则为当前目录）：")
     if not output_dir:
@@ -459,22 +2176,224 @@ def split_excel_or_csv():
         else:
             print("无效的格式，请选择 'csv' 或 'xlsx'。")
 
-    for i, df_slice in enumerate(sliced_dataframes):
-        df = df_slice.copy()
+    if slice_method == '3':
+        try:
+            split_by_column(file_path, selected_columns, rename_map, partition_column, buckets,
+                            output_dir, output_filename_base, output_format, chunk_rows=plan.chunk_rows)
+        except Exception as e:
+            print(f"❌ 拆分失败: {type(e).__name__}: {e}")
+        return
 
-        output_filename = f"{output_filename_base}_part_{i + 1}.{output_format}"
-        output_path = os.path.join(output_dir, output_filename)
+    output_paths = [os.path.join(output_dir, f"{output_filename_base}_part_{i + 1}.{output_format}")
+                    for i in range(len(ranges))]
+    if processed_df is None:
+        try:
+            write_slices_in_chunks(file_path, selected_columns, rename_map, ranges, output_paths,
+                                   plan.chunk_rows)
+        except Exception as e:
+            print(f"❌ 截取失败: {type(e).__name__}: {e}")
+        return
 
+    def write_slice(item):
+        output_path, (start, end) = item
+        df = processed_df.iloc[start:end]
         try:
-            if output_format == 'xlsx':
-                df.to_excel(output_path, index=False)
-            else:
-                # 使用 utf-8-sig 编码
-                df.to_csv(output_path, index=False, encoding='utf-8-sig')
-            print(f"文件已保存至：{output_path}")
+            with profiler.stage('write', output_path) as rec:
+                if output_format == 'xlsx':
+                    df.to_excel(output_path, index=False)
+                else:
+                    # 使用 utf-8-sig 编码
+                    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+                rec['rows'] = len(df)
+                rec['bytes'] = os.path.getsize(output_path)
+            return output_path, None
         except Exception as e:
-            print(f"❌ 保存失败 {output_path}: {e}")
+            return output_path, e
+
+    # 各分段互不依赖，由写出线程并行保存
+    for output_path, error in run_pipeline(zip(output_paths, ranges), [(write_slice, plan.workers)]):
+        if error is None:
+            print(f"文件已保存至：{output_path}")
+        else:
+            print(f"❌ 保存失败 {output_path}: {error}")
+
+    print("\n所有截取操作已完成！")
+
+
+# ========================
+# 按列值拆分
+# ========================
 
+PARTITION_CHUNK_ROWS = 200_000
+PARTITION_MAX_OPEN_FILES = 64
+
+
+def choose_partition(columns):
+    """询问拆分依据的列和方式，返回 (列名, 哈希桶数)；按原值拆分时桶数为 None"""
+    print("\n可用于拆分的列：['" + "', '".join(columns) + "']")
+    while True:
+        column = input("请输入按哪一列拆分：").strip()
+        if column in columns:
+            break
+        print(f"错误：列 '{column}' 不存在，请重新输入。")
+
+    mode = get_user_choice("拆分方式: 1) 每个不同的值一个文件  2) 按哈希分桶到固定数量的文件（默认 1）: ",
+                           ['1', '2'], '1')
+    if mode == '1':
+        return column, None
+    while True:
+        try:
+            buckets = int(input("请输入分桶数量："))
+            if buckets > 0:
+                return column, buckets
+        except ValueError:
+            pass
+        print("输入无效，请输入一个大于0的整数。")
+
+
+def partition_file_name(key, used_names):
+    """将分区键转换为合法且不重复的文件名片段"""
+    if key is None:
+        name = "空值"
+    else:
+        name = str(key).strip()
+        for ch in '\\/:*?"<>|\r\n\t':
+            name = name.replace(ch, '_')
+        name = name[:100] or "空值"
+    candidate, n = name, 2
+    while candidate.lower() in used_names:
+        candidate = f"{name}_{n}"
+        n += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+class PartitionWriters:
+    """
+    每个分区一个 CSV 文件，按 LRU 保持至多 max_open 个打开的句柄，
+    被关闭的分区再次写入时以追加方式重新打开。
+    """
+
+    def __init__(self, directory, prefix, columns, max_open=PARTITION_MAX_OPEN_FILES):
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = list(columns)
+        self.max_open = max_open
+        self.paths = {}
+        self.rows = {}
+        self._handles = OrderedDict()
+        self._used_names = set()
+
+    def write(self, key, rows):
+        """rows 为已按列顺序排列的行列表，空值应已替换为空字符串"""
+        new = key not in self.paths
+        if new:
+            name = partition_file_name(key, self._used_names)
+            self.paths[key] = os.path.join(self.directory, f"{self.prefix}_{name}.csv")
+            self.rows[key] = 0
+        writer = self._writer(key, new)
+        if new:
+            writer.writerow(self.columns)
+        writer.writerows(rows)
+        self.rows[key] += len(rows)
+
+    def _writer(self, key, new):
+        if key in self._handles:
+            self._handles.move_to_end(key)
+            return self._handles[key][1]
+        while len(self._handles) >= self.max_open:
+            _, (old, _) = self._handles.popitem(last=False)
+            old.close()
+        if new:
+            # 新文件带 BOM，重新打开追加时不再写入
+            handle = open(self.paths[key], 'w', encoding='utf-8-sig', newline='')
+        else:
+            handle = open(self.paths[key], 'a', encoding='utf-8', newline='')
+        # 与 DataFrame.to_csv 的默认换行保持一致
+        writer = csv.writer(handle, lineterminator=os.linesep)
+        self._handles[key] = (handle, writer)
+        return writer
+
+    def close(self):
+        while self._handles:
+            _, (handle, _) = self._handles.popitem(last=False)
+            handle.close()
+
+
+def iter_selected_chunks(file_path, selected_columns, rename_map, chunk_rows=PARTITION_CHUNK_ROWS):
+    """按块读取选中的列；CSV 流式读取，Excel 无法流式解析，整表读入后分块返回"""
+    if table_ext(file_path) == '.xlsx':
+        df = read_selected_columns(file_path, selected_columns, rename_map)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows]
+        return
+    reader = read_csv_any(file_path, usecols=selected_columns, dtype=str, encoding='utf-8',
+                         on_bad_lines='skip', chunksize=chunk_rows)
+    for chunk in reader:
+        yield chunk[selected_columns].rename(columns=rename_map)
+
+
+def split_by_column(file_path, selected_columns, rename_map, partition_column, buckets,
+                    output_dir, prefix, output_format, chunk_rows=PARTITION_CHUNK_ROWS):
+    """单次遍历输入，按列值或哈希桶把行写入各自的分区文件"""
+    if output_format == 'xlsx':
+        # 先流式写入临时 CSV 分区，最后逐个转换为 xlsx，避免同时持有多个工作簿
+        work_dir = tempfile.mkdtemp(prefix=".partition_", dir=output_dir)
+    else:
+        work_dir = output_dir
+    writers = PartitionWriters(work_dir, prefix, [rename_map.get(col, col) for col in selected_columns])
+    label_width = len(str(buckets - 1)) if buckets else 0
+
+    total_rows = 0
+    try:
+        # 预取线程读取下一块，与当前块的拆分写出重叠
+        for chunk in run_pipeline(iter_selected_chunks(file_path, selected_columns, rename_map, chunk_rows)):
+            with profiler.stage('partition', file_path) as rec:
+                values = chunk[partition_column].astype(object)
+                if buckets:
+                    hashes = pd.util.hash_pandas_object(values.fillna(''), index=False).to_numpy()
+                    keys = hashes % buckets
+                else:
+                    keys = values
+                # 按分区键稳定排序后，每个分区是一段连续的行，整块转换一次再按段写出
+                codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+                order = np.argsort(codes, kind='stable')
+                sorted_codes = codes[order]
+                rows = chunk.astype(object).where(chunk.notna(), '').to_numpy()[order].tolist()
+                bounds = (np.flatnonzero(np.diff(sorted_codes)) + 1).tolist()
+                for start, end in zip([0] + bounds, bounds + [len(rows)]):
+                    key = uniques[sorted_codes[start]]
+                    if buckets:
+                        key = f"bucket_{int(key):0{label_width}d}"
+                    elif pd.isna(key):
+                        key = None
+                    writers.write(key, rows[start:end])
+                rec['rows'] = len(chunk)
+            total_rows += len(chunk)
+    finally:
+        writers.close()
+
+    if not writers.paths:
+        print("未生成任何拆分数据。")
+    elif output_format == 'xlsx':
+        for key, csv_path in writers.paths.items():
+            xlsx_path = os.path.join(output_dir, os.path.basename(csv_path)[:-4] + ".xlsx")
+            try:
+                with profiler.stage('write', xlsx_path) as rec:
+                    part = pd.read_csv(csv_path, dtype=str, encoding='utf-8-sig')
+                    part.to_excel(xlsx_path, index=False)
+                    rec['rows'] = len(part)
+                writers.paths[key] = xlsx_path
+            except Exception as e:
+                print(f"❌ 保存失败 {xlsx_path}: {e}")
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n共处理 {total_rows} 行，拆分为 {len(writers.paths)} 个文件：")
+    for i, (key, path) in enumerate(writers.paths.items()):
+        if i == 20:
+            print(f"  ...（其余 {len(writers.paths) - 20} 个文件省略）")
+            break
+        print(f"  {path}: {writers.rows[key]} 行")
     print("\n所有截取操作已完成！")
 
 
@@ -483,16 +2402,16 @@ def split_excel_or_csv():
 # ========================
 
 def read_file(file_path, sheet=None):
-    ext = file_path.suffix.lower()
+    ext = table_ext(file_path)
     try:
         if ext in ['.xlsx', '.xls']:
-            excel_file = pd.ExcelFile(file_path)
+            sheet_names = cached_sheet_names(file_path)
             if sheet is None:
-                sheet = excel_file.sheet_names[0]
-            df = pd.read_excel(file_path, sheet_name=sheet, dtype=str)
-            return df, excel_file.sheet_names
+                sheet = sheet_names[0]
+            df = cached_read_table(file_path, sheet_name=sheet)
+            return df, sheet_names
         elif ext == '.csv':
-            df = pd.read_csv(file_path, dtype=str, low_memory=False)
+            df = cached_read_table(file_path)
             return df, ["CSV"]
         else:
             raise ValueError(f"不支持的文件格式: {ext}")
@@ -562,42 +2481,8 @@ def select_sheet(sheet_names):
             return default_sheet
 
 
-def deduplicate_files():
-    print("\n" + "=" * 40)
-    print("=== CSV/XLSX 文件查重删除工具 ===")
-    print("=" * 40 + "\n")
-
-    # 1. 输入主文件路径
-    main_path = input("请输入主文件路径（被查重的文件）: ").strip().strip('"\'')
-    main_file = Path(main_path)
-    if not main_file.exists():
-        print(f"文件不存在: {main_file}")
-        return
-
-    # 读取主文件
-    try:
-        main_df, main_sheets = read_file(main_file)
-        print(f"成功读取主文件，共 {len(main_sheets)} 个 Sheet。")
-        main_sheet = select_sheet(main_sheets)
-
-        # 重新读取用户选择的 sheet（保持 dtype=str）
-        if main_file.suffix.lower() in ['.xlsx', '.xls']:
-            main_df = pd.read_excel(main_file, sheet_name=main_sheet, dtype=str)
-        # CSV 已读取，无需再处理
-
-    except Exception as e:
-        print(f"读取主文件失败: {e}")
-        return
-
-    # 显示列名（每个列名加 ' '，逗号分隔，不加 [ ]）
-    columns_quoted = ", ".join(f"'{col}'" for col in main_df.columns)
-    print(f"\n主文件 '{main_sheet}' 的原始列名: {columns_quoted}")
-    main_column = input("请输入主文件用于比较的列名: ").strip()
-    if not main_column:
-        print("列名不能为空！")
-        return
-
-    # 2. 输入对比文件
+def collect_ref_configs():
+    """输入对比文件并逐个选择 Sheet 和比较列，返回配置列表（已读取的 DataFrame 在 'df' 中）"""
     print("\n请输入对比文件路径（多个用分号 ; 分隔，或一行一个，空行结束）:")
     ref_input = input().strip()
     ref_files = []
@@ -612,29 +2497,31 @@ def deduplicate_files():
                 break
             ref_files.append(Path(line.strip('"\'')))
 
-    valid_ref_files = [f for f in ref_files if f.exists()]
+    valid_ref_files = [f for f in ref_files if path_exists(f)]
     if not valid_ref_files:
         print("没有有效的对比文件！")
-        return
+        return []
 
     for f in ref_files:
-        if not f.exists():
+        if not path_exists(f):
             print(f"跳过不存在的文件: {f}")
 
-    # 3. 配置对比文件
     ref_configs = []
     print("\n配置每个对比文件的 Sheet 和比较列:")
     for file in valid_ref_files:
         print(f"\n--- {file.name} ---")
         try:
-            _, sheets = read_file(file)
+            with profiler.stage('parse', file) as rec:
+                df_temp, sheets = read_file(file)
+                rec['rows'] = len(df_temp)
+                rec['bytes'] = source_size(file)
             sheet = select_sheet(sheets)
 
-            # 读取指定 sheet
-            if file.suffix.lower() in ['.xlsx', '.xls']:
-                df_temp = pd.read_excel(file, sheet_name=sheet, dtype=str)
-            else:
-                df_temp = pd.read_csv(file, dtype=str, low_memory=False)
+            # 读取指定 sheet（首个 sheet / CSV 已读取）
+            if table_ext(file) in ['.xlsx', '.xls'] and sheet != sheets[0]:
+                with profiler.stage('parse', file) as rec:
+                    df_temp, _ = read_file(file, sheet)
+                    rec['rows'] = len(df_temp)
 
             # 显示列名（加引号，去括号）
             columns_quoted = ", ".join(f"'{col}'" for col in df_temp.columns)
@@ -656,36 +2543,138 @@ def deduplicate_files():
 
     if not ref_configs:
         print("没有配置任何有效的对比文件！")
+    return ref_configs
+
+
+def build_ref_values(ref_configs):
+    """汇总所有对比文件比较列的值，构建查重用的集合"""
+    all_ref_values = set()
+    for config in ref_configs:
+        df = config['df']
+        col = config['column']
+        print(f"处理: {config['file'].name} [{config['sheet']}] 列 '{col}'")
+        with profiler.stage('build_ref_set', config['file']) as rec:
+            values = get_column_data(df, col)
+            all_ref_values.update(values)
+            rec['rows'] = len(df)
+        print(f"添加 {len(values)} 个值，累计 {len(all_ref_values)} 个。")
+
+    print(f"总共 {len(all_ref_values)} 个用于查重的值。")
+    return all_ref_values
+
+
+def duplicate_mask(df, column, ref_values):
+    """column 列的值（去除首尾空格后）出现在 ref_values 中的行为 True，空值不算重复"""
+    if column not in df.columns:
+        return pd.Series(False, index=df.index)
+    values = df[column]
+    keys = values.astype(str).str.strip().to_numpy(dtype=object)
+    found = np.fromiter((key in ref_values for key in keys), dtype=bool, count=len(keys))
+    return pd.Series(found & values.notna().to_numpy(), index=df.index)
+
+
+def dedup_csv_in_chunks(main_file, column, ref_values, output_file, chunk_rows):
+    """
+    主文件为大 CSV 时分块读取、过滤、写出，返回 (总行数, 删除行数)。
+    按字符串读取，xlsx 输出先写入临时 CSV，最后逐块写入工作簿。
+    """
+    def match(chunk):
+        with profiler.stage('match', main_file) as rec:
+            rec['rows'] = len(chunk)
+            mask = duplicate_mask(chunk, column, ref_values)
+            return len(chunk), chunk[~mask]
+
+    columns = read_csv_any(main_file, nrows=0).columns.tolist()
+    writer = ChunkWriter(output_file, columns, dict.fromkeys(columns, str))
+    total_rows = 0
+    try:
+        reader = read_csv_any(main_file, dtype=str, chunksize=chunk_rows)
+        for n_rows, filtered in run_pipeline(profiled_chunks(reader, main_file), [match]):
+            writer.write(filtered)
+            total_rows += n_rows
+    except BaseException:
+        writer.discard()
+        raise
+    writer.close()
+    return total_rows, total_rows - writer.rows
+
+
+def deduplicate_files():
+    print("\n" + "=" * 40)
+    print("=== CSV/XLSX 文件查重删除工具 ===")
+    print("=" * 40 + "\n")
+
+    mode = get_user_choice(
+        "请选择查重方式: 1) 单个主文件  2) 批量（多个主文件或文件夹，共用同一组对比文件）（默认 1）: ",
+        ['1', '2'], '1'
+    )
+    if mode == '2':
+        deduplicate_batch()
+        return
+
+    # 1. 输入主文件路径
+    main_path = input("请输入主文件路径（被查重的文件）: ").strip().strip('"\'')
+    main_file = Path(main_path)
+    if not path_exists(main_file):
+        print(f"文件不存在: {main_file}")
+        return
+
+    # 读取主文件：超出内存预算的 CSV 只读表头，查重时分块读取
+    csv_main = table_ext(main_file) == '.csv'
+    plan = planner.plan('dedup', [main_file], supports=('memory', 'streaming') if csv_main else ('memory',))
+    try:
+        if plan.in_memory:
+            with profiler.stage('parse', main_file) as rec:
+                main_df, main_sheets = read_file(main_file)
+                rec['rows'] = len(main_df)
+                rec['bytes'] = source_size(main_file)
+            print(f"成功读取主文件，共 {len(main_sheets)} 个 Sheet。")
+        else:
+            main_df, main_sheets = read_csv_any(main_file, dtype=str, nrows=0), ["CSV"]
+            print("主文件将在查重时分块读取。")
+        main_sheet = select_sheet(main_sheets)
+
+        # 重新读取用户选择的 sheet（保持 dtype=str）
+        if table_ext(main_file) in ['.xlsx', '.xls'] and main_sheet != main_sheets[0]:
+            with profiler.stage('parse', main_file) as rec:
+                main_df, _ = read_file(main_file, main_sheet)
+                rec['rows'] = len(main_df)
+        # CSV 已读取，无需再处理
+
+    except Exception as e:
+        print(f"读取主文件失败: {e}")
+        return
+
+    # 显示列名（每个列名加 ' '，逗号分隔，不加 [ ]）
+    columns_quoted = ", ".join(f"'{col}'" for col in main_df.columns)
+    print(f"\n主文件 '{main_sheet}' 的原始列名: {columns_quoted}")
+    main_column = input("请输入主文件用于比较的列名: ").strip()
+    if not main_column:
+        print("列名不能为空！")
+        return
+
+    # 2~3. 输入并配置对比文件
+    ref_configs = collect_ref_configs()
+    if not ref_configs:
         return
 
     # 4. 查重处理
     print("\n开始查重处理...")
     try:
         main_values_set = get_column_data(main_df, main_column)
-        print(f"主文件 '{main_column}' 列共 {len(main_values_set)} 个唯一值（仅用于检查）。")
-
-        all_ref_values = set()
-        for config in ref_configs:
-            df = config['df']
-            col = config['column']
-            print(f"处理: {config['file'].name} [{config['sheet']}] 列 '{col}'")
-            values = get_column_data(df, col)
-            all_ref_values.update(values)
-            print(f"添加 {len(values)} 个值，累计 {len(all_ref_values)} 个。")
-
-        print(f"总共 {len(all_ref_values)} 个用于查重的值。")
+        if plan.in_memory:
+            print(f"主文件 '{main_column}' 列共 {len(main_values_set)} 个唯一值（仅用于检查）。")
 
-        def is_duplicate(row):
-            key = row.get(main_column)
-            if pd.isna(key) or key is None:
-                return False
-            return str(key).strip() in all_ref_values
+        all_ref_values = build_ref_values(ref_configs)
 
-        mask = main_df.apply(is_duplicate, axis=1)
-        removed_count = mask.sum()
-        filtered_df = main_df[~mask]
+        if plan.in_memory:
+            with profiler.stage('match', main_file) as rec:
+                mask = duplicate_mask(main_df, main_column, all_ref_values)
+                removed_count = mask.sum()
+                filtered_df = main_df[~mask]
+                rec['rows'] = len(main_df)
 
-        print(f"查重完成！删除 {removed_count} 行，剩余 {len(filtered_df)} 行。")
+            print(f"查重完成！删除 {removed_count} 行，剩余 {len(filtered_df)} 行。")
 
         # 5. 保存结果
         output_path = input("\n请输入保存路径（如 result.xlsx）: ").strip().strip('"\'')
@@ -694,11 +2683,24 @@ def deduplicate_files():
             return
 
         output_file = Path(output_path)
+        if not plan.in_memory:
+            try:
+                total_rows, removed_count = dedup_csv_in_chunks(
+                    main_file, main_column, all_ref_values, output_file, plan.chunk_rows)
+            except Exception as e:
+                print(f"保存失败: {e}")
+                return
+            print(f"查重完成！删除 {removed_count} 行，剩余 {total_rows - removed_count} 行。")
+            print(f"成功保存至:\n   {output_file.resolve()}")
+            return
         try:
-            if output_file.suffix.lower() == '.csv':
-                filtered_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-            else:
-                filtered_df.to_excel(output_file, index=False, engine='openpyxl')
+            with profiler.stage('write', output_file) as rec:
+                if table_ext(output_file) == '.csv':
+                    write_csv(filtered_df, output_file)
+                else:
+                    filtered_df.to_excel(output_file, index=False, engine='openpyxl')
+                rec['rows'] = len(filtered_df)
+                rec['bytes'] = output_file.stat().st_size
             print(f"成功保存至:\n   {output_file.resolve()}")
         except Exception as e:
             print(f"保存失败: {e}")
@@ -708,6 +2710,168 @@ def deduplicate_files():
         return
 
 
+# ========================
+# 批量查重
+# ========================
+
+# 工作进程共享的对比值集合：fork 时由子进程直接继承（写时复制，不重复序列化），
+# 不支持 fork 的平台（Windows）在进程初始化时传入一次
+_dedup_ref_values = None
+
+
+def _init_dedup_worker(ref_values=None):
+    global _dedup_ref_values
+    if ref_values is not None:
+        _dedup_ref_values = ref_values
+    # 工作进程只读一次文件，不使用也不写回解析缓存
+    table_cache.enabled = False
+
+
+def dedup_one_file(main_file, column, output_file):
+    """对单个主文件查重并写出结果，返回 (总行数, 删除行数)"""
+    df, _ = read_file(main_file)
+    if column not in df.columns:
+        raise ValueError(f"未找到列 '{column}'，可用列名：{list(df.columns)}")
+    mask = duplicate_mask(df, column, _dedup_ref_values)
+    filtered_df = df[~mask]
+    if table_ext(output_file) == '.csv':
+        write_csv(filtered_df, output_file)
+    else:
+        filtered_df.to_excel(output_file, index=False, engine='openpyxl')
+    return len(df), int(mask.sum())
+
+
+def batch_output_name(main_file, used_names):
+    """主文件对应的输出文件名：<原文件名>_dedup<后缀>，压缩后缀去掉，Excel 统一输出 .xlsx"""
+    archive, member = split_archive_member(main_file)
+    name = os.path.basename(member or archive)
+    if os.path.splitext(name.lower())[1] in COMPRESSION_SUFFIXES:
+        name = os.path.splitext(name)[0]
+    stem = os.path.splitext(name)[0]
+    ext = '.csv' if table_ext(main_file) == '.csv' else '.xlsx'
+    candidate = f"{stem}_dedup{ext}"
+    n = 2
+    while candidate.lower() in used_names:
+        candidate = f"{stem}_dedup_{n}{ext}"
+        n += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+def collect_main_files(paths_input):
+    """解析分号分隔的文件/文件夹列表，文件夹展开为其中的表格文件，zip 包展开为包内文件"""
+    main_files = []
+    for raw in paths_input.split(';'):
+        path = raw.strip().strip('"\'')
+        if not path:
+            continue
+        if os.path.isdir(path):
+            found = sorted(str(p) for pattern in INPUT_GLOBS for p in Path(path).glob(pattern))
+            if not found:
+                print(f"文件夹中没有 .csv、Excel 或压缩文件: {path}")
+            main_files.extend(found)
+        elif path_exists(path):
+            main_files.append(path)
+        else:
+            print(f"跳过不存在的文件: {path}")
+    return expand_archives(main_files)
+
+
+def run_batch_dedup(main_files, column, ref_values, output_dir, workers=None):
+    """
+    多进程并行查重，每个文件完成即输出结果，返回成功处理的文件数。
+    对比值集合只构建一次，由各工作进程只读共享。
+    """
+    global _dedup_ref_values
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(main_files)))
+    used_names = set()
+    jobs = [(f, column, os.path.join(output_dir, batch_output_name(f, used_names))) for f in main_files]
+
+    def report(main_file, output_file, result):
+        total, removed = result
+        name = os.path.basename(split_archive_member(main_file)[1] or str(main_file))
+        print(f"✅ {name}: 删除 {removed} 行，剩余 {total - removed} 行 -> {output_file}")
+        return total
+
+    done = 0
+    with profiler.stage('batch_dedup') as rec:
+        rec['rows'] = 0
+        if workers == 1:
+            _dedup_ref_values = ref_values
+            try:
+                for main_file, col, output_file in jobs:
+                    try:
+                        rec['rows'] += report(main_file, output_file, dedup_one_file(main_file, col, output_file))
+                        done += 1
+                    except Exception as e:
+                        print(f"❌ {main_file} 处理失败: {e}")
+            finally:
+                _dedup_ref_values = None
+            return done
+
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context, initargs = multiprocessing.get_context('fork'), ()
+            _dedup_ref_values = ref_values
+        else:
+            context, initargs = multiprocessing.get_context('spawn'), (ref_values,)
+        print(f"使用 {workers} 个进程并行处理 {len(jobs)} 个文件...")
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_dedup_worker, initargs=initargs) as pool:
+                futures = {pool.submit(dedup_one_file, *job): job for job in jobs}
+                for future in as_completed(futures):
+                    main_file, _, output_file = futures[future]
+                    try:
+                        rec['rows'] += report(main_file, output_file, future.result())
+                        done += 1
+                    except Exception as e:
+                        print(f"❌ {main_file} 处理失败: {e}")
+        finally:
+            _dedup_ref_values = None
+    return done
+
+
+def deduplicate_batch():
+    """批量查重：多个主文件共用同一主文件列名和同一组对比文件"""
+    paths_input = input("请输入主文件路径或文件夹（多个用分号 ; 分隔）: ").strip()
+    main_files = collect_main_files(paths_input)
+    if not main_files:
+        print("没有有效的主文件！")
+        return
+    print(f"共 {len(main_files)} 个主文件（Excel 文件使用第一个 Sheet）:")
+    for i, f in enumerate(main_files):
+        print(f"  {i + 1}. {f}")
+
+    main_column = input("请输入主文件用于比较的列名（所有主文件相同）: ").strip()
+    if not main_column:
+        print("列名不能为空！")
+        return
+
+    ref_configs = collect_ref_configs()
+    if not ref_configs:
+        return
+
+    print("\n开始查重处理...")
+    try:
+        all_ref_values = build_ref_values(ref_configs)
+    except Exception as e:
+        print(f"处理失败: {e}")
+        return
+    # 对比文件的 DataFrame 不再需要，释放后再创建工作进程
+    ref_configs.clear()
+
+    # 对比值集合由各进程共享，计入每个计划的常驻内存
+    ref_bytes = sys.getsizeof(all_ref_values) + sum(map(sys.getsizeof, all_ref_values))
+    plan = planner.plan('dedup', main_files, supports=('memory', 'parallel'),
+                        max_workers=len(main_files), shared_bytes=ref_bytes, sequential=True)
+    output_dir = get_output_dir("\n请输入保存结果的目录（留空为当前目录）: ")
+    done = run_batch_dedup(main_files, main_column, all_ref_values, output_dir,
+                           workers=plan.workers if plan.strategy == 'parallel' else 1)
+    print(f"\n批量查重完成：成功 {done} 个，失败 {len(main_files) - done} 个。")
+
+
 # ========================
 # 清理空行功能
 # ========================
@@ -719,19 +2883,19 @@ def clean_spreadsheet_main():
 
     # 1. 输入文件路径
     input_path = input("📌 请输入或拖入 CSV/XLSX 文件路径: ").strip().strip('"\'')
-    if not input_path or not os.path.exists(input_path):
+    if not input_path or not path_exists(input_path):
         print("❌ 文件路径无效或不存在！")
         return
 
     # 2. 自动读取列名
-    ext = os.path.splitext(input_path)[1].lower()
+    ext = table_ext(input_path)
     try:
         if ext == '.csv':
-            df = pd.read_csv(input_path, nrows=0)  # 只读标题
+            df = read_csv_any(input_path, nrows=0)  # 只读标题
         elif ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(input_path, nrows=0)
+            df = read_excel_any(input_path, nrows=0)
         else:
-            print("❌ 不支持的文件格式！仅支持 .csv、.xlsx、.xls")
+            print("❌ 不支持的文件格式！仅支持 .csv、.xlsx、.xls（CSV 可为 .gz/.zst/.xz/.bz2 压缩或位于 zip 包内）")
             return
         columns = df.columns.tolist()
     except Exception as e:
@@ -816,16 +2980,31 @@ def clean_spreadsheet(input_path, output_path, check_columns):
     """
     读取 CSV/XLSX 文件，删除指定列中为空的行，并保存结果。
     """
-    ext = os.path.splitext(input_path)[1].lower()
+    ext = table_ext(input_path)
+    out_ext = table_ext(output_path)
+    # CSV 到 CSV 按字符串处理，输出保持原始文本（整表读入时可复用解析缓存，过大时分块流式处理）；
+    # CSV 到 Excel 过大时分块处理后落盘再转换
+    if ext == '.csv' and out_ext == '.csv':
+        supports = ('memory', 'streaming')
+    elif ext == '.csv':
+        supports = ('memory', 'spill')
+    else:
+        supports = ('memory',)
+    plan = planner.plan('clean', [input_path], supports=supports)
+    if not plan.in_memory:
+        return clean_csv_in_chunks(input_path, output_path, check_columns, chunk_rows=plan.chunk_rows)
+
     try:
+        with profiler.stage('parse', input_path) as rec:
+            if ext not in ['.csv', '.xlsx', '.xls']:
+                raise ValueError(f"不支持的文件格式: {ext}")
+            df = cached_read_table(input_path, typed=not (ext == '.csv' and out_ext == '.csv'))
+            rec['rows'] = len(df)
+            rec['bytes'] = source_size(input_path)
         if ext == '.csv':
-            df = pd.read_csv(input_path, encoding='utf-8')
             print(f"✅ 已读取 CSV 文件: {input_path}")
-        elif ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(input_path)
-            print(f"✅ 已读取 Excel 文件: {input_path}")
         else:
-            raise ValueError(f"不支持的文件格式: {ext}")
+            print(f"✅ 已读取 Excel 文件: {input_path}")
     except Exception as e:
         raise Exception(f"读取文件失败: {e}")
 
@@ -835,13 +3014,9 @@ def clean_spreadsheet(input_path, output_path, check_columns):
         raise ValueError(f"以下列在文件中未找到: {missing_cols}")
 
     # 检查空白
-    mask = pd.Series([True] * len(df), index=df.index)
-    for col in check_columns:
-        # 同时检查 NaN 和空字符串/纯空格
-        col_not_empty = df[col].notna() & (df[col].astype(str).str.strip() != '')
-        mask &= col_not_empty
-
-    cleaned_df = df[mask].reset_index(drop=True)
+    with profiler.stage('blank_drop', input_path) as rec:
+        cleaned_df = df[non_blank_mask(df, check_columns)].reset_index(drop=True)
+        rec['rows'] = len(df)
 
     # 确保输出目录存在
     output_dir = os.path.dirname(output_path)
@@ -849,14 +3024,16 @@ def clean_spreadsheet(input_path, output_path, check_columns):
         os.makedirs(output_dir)
 
     # 保存
-    out_ext = os.path.splitext(output_path)[1].lower()
     try:
-        if out_ext == '.csv':
-            cleaned_df.to_csv(output_path, index=False, encoding='utf-8-sig')
-        elif out_ext in ['.xlsx', '.xls']:
-            cleaned_df.to_excel(output_path, index=False)
-        else:
-            raise ValueError(f"不支持的输出格式: {out_ext}")
+        with profiler.stage('write', output_path) as rec:
+            if out_ext == '.csv':
+                write_csv(cleaned_df, output_path)
+            elif out_ext in ['.xlsx', '.xls']:
+                cleaned_df.to_excel(output_path, index=False)
+            else:
+                raise ValueError(f"不支持的输出格式: {out_ext}")
+            rec['rows'] = len(cleaned_df)
+            rec['bytes'] = os.path.getsize(output_path)
         print(f"\n✅ 处理完成！")
         print(f"📊 原始行数: {len(df)}")
         print(f"🧹 清理后行数: {len(cleaned_df)}")
@@ -865,6 +3042,71 @@ def clean_spreadsheet(input_path, output_path, check_columns):
         raise Exception(f"保存文件失败: {e}")
 
 
+CLEAN_CHUNK_ROWS = 200_000
+
+
+def non_blank_mask(df, check_columns):
+    """指定列都不为空（NaN、空字符串、纯空格）的行为 True"""
+    mask = pd.Series([True] * len(df), index=df.index)
+    for col in check_columns:
+        # 同时检查 NaN 和空字符串/纯空格
+        col_not_empty = df[col].notna() & (df[col].astype(str).str.strip() != '')
+        mask &= col_not_empty
+    return mask
+
+
+def clean_csv_in_chunks(input_path, output_path, check_columns, chunk_rows=CLEAN_CHUNK_ROWS):
+    """
+    CSV 的流式清理：读取、过滤、写出三个阶段通过流水线重叠执行，内存占用与文件大小无关。
+    按字符串读取，输出保持原始文本（不会把含空值的整数列写成 1.0）。
+    输出为 Excel 时先写入临时 CSV，再按整个输入推断的列类型逐块写入工作簿，
+    使单元格类型与整表读入时一致。
+    """
+    try:
+        columns = read_csv_any(input_path, nrows=0, encoding='utf-8').columns.tolist()
+        reader = read_csv_any(input_path, encoding='utf-8', dtype=str, chunksize=chunk_rows)
+    except Exception as e:
+        raise Exception(f"读取文件失败: {e}")
+    print(f"✅ 已打开 CSV 文件（分块读取）: {input_path}")
+
+    missing_cols = [col for col in check_columns if col not in columns]
+    if missing_cols:
+        raise ValueError(f"以下列在文件中未找到: {missing_cols}")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    def drop_blank(chunk):
+        with profiler.stage('blank_drop', input_path) as rec:
+            rec['rows'] = len(chunk)
+            return len(chunk), chunk[non_blank_mask(chunk, check_columns)]
+
+    if table_ext(output_path) == '.csv':
+        dtypes = dict.fromkeys(columns, str)
+    else:
+        # 过滤前的整个输入决定列类型（被删除的行中的空白单元格也会让列变为文本），与整表读入时一致
+        with profiler.stage('dtype_scan', input_path):
+            dtypes = infer_csv_dtypes(input_path, chunk_rows, encoding='utf-8')
+    writer = ChunkWriter(output_path, columns, dtypes)
+
+    total_rows = 0
+    try:
+        for n_rows, cleaned in run_pipeline(profiled_chunks(reader, input_path), [drop_blank]):
+            writer.write(cleaned)
+            total_rows += n_rows
+        writer.close()
+    except Exception as e:
+        writer.discard()
+        raise Exception(f"处理文件失败: {e}")
+    kept_rows = writer.rows
+
+    print("\n✅ 处理完成！")
+    print(f"📊 原始行数: {total_rows}")
+    print(f"🧹 清理后行数: {kept_rows}")
+    print(f"💾 已保存到: {output_path}")
+
+
 # ========================
 # 主程序入口
 # ========================
@@ -885,13 +3127,13 @@ def main():
         )
 
         if choice == '1':
-            merge_files()
+            profiler.run('merge', merge_files)
         elif choice == '2':
-            split_excel_or_csv()
+            profiler.run('split', split_excel_or_csv)
         elif choice == '3':
-            deduplicate_files()
+            profiler.run('dedup', deduplicate_files)
         elif choice == '4':
-            clean_spreadsheet_main()
+            profiler.run('clean', clean_spreadsheet_main)
         elif choice == '5':
             print("👋 感谢使用，再见！")
             sys.exit(0)
@@ -900,7 +3142,42 @@ def main():
         exit_or_continue()
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="xlsxSelector：CSV/Excel 合并、分割、查重、清理工具")
+    parser.add_argument('--profile', action='store_true',
+                        help="启用性能统计，每个操作结束后输出各阶段耗时/行数/内存汇总")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="将性能统计写入 JSON 文件（隐含 --profile）")
+    parser.add_argument('--profile-trace', choices=['cprofile', 'pyinstrument'],
+                        help="为每个操作额外保存调用栈记录（隐含 --profile）")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="禁用解析结果缓存（默认在内存中缓存，并在退出时写入缓存目录）")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help="缓存目录（默认 ~/.xlsxselector_cache）")
+    parser.add_argument('--cache-mb', type=int, default=512,
+                        help="内存缓存预算（MB），超出后按最久未使用溢出到磁盘（默认 512）")
+    parser.add_argument('--plan', choices=['auto'] + list(PLAN_STRATEGIES),
+                        default=os.environ.get('XLSXSELECTOR_PLAN', 'auto'),
+                        help="执行策略：auto 按输入规模和可用内存自动选择（默认，也可用环境变量 XLSXSELECTOR_PLAN 指定）")
+    parser.add_argument('--chunk-rows', type=int, help="分块处理时每块的行数（默认自动）")
+    parser.add_argument('--workers', type=int, help="并行进程/线程数（默认自动）")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    # 打包为可执行文件后，多进程的子进程需要由此进入
+    multiprocessing.freeze_support()
+    args = parse_args()
+    profiler.enabled = bool(args.profile or args.profile_json or args.profile_trace)
+    profiler.json_path = args.profile_json
+    profiler.trace = args.profile_trace
+    table_cache.enabled = not args.no_cache
+    table_cache.memory_budget = args.cache_mb * 2 ** 20
+    if args.cache_dir:
+        table_cache.cache_dir = args.cache_dir
+    planner.strategy = None if args.plan == 'auto' else args.plan
+    planner.chunk_rows = args.chunk_rows
+    planner.workers = args.workers
     try:
         main()
     except KeyboardInterrupt: